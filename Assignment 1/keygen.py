@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import getopt
 import random
@@ -7,6 +8,11 @@ import random
 
 with open('alphabet.txt', 'r') as f: alph = f.read()
 
+# the DRBG used for bulk keys lives with the AES implementation
+drbg_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Assignment 4')
+if drbg_dir not in sys.path:
+    sys.path.append(drbg_dir)
+
 
 def generate_key(length):
     """
@@ -18,18 +24,46 @@ def generate_key(length):
     return key
 
 
+def generate_keys(count, length, seed = None):
+    """
+    Generates count keys of the specified length in bulk
+    from an AES CTR_DRBG (reproducible if a seed is given)
+    """
+    from drbg import CTRDRBG
+
+    if length == 0:
+        return [''] * count
+    drbg = CTRDRBG(seed)
+
+    # rejection sampling: only bytes below the largest multiple of the
+    # alphabet size are used, so every character is equally likely
+    limit = 256 - 256 % len(alph)
+    table = bytes(ord(alph[b % len(alph)]) if b < limit else 0 for b in range(256))
+    rejected = bytes(range(limit, 256))
+
+    total = count * length
+    chars = bytearray()
+    while len(chars) < total:
+        need = total - len(chars)
+        chars += drbg.random_bytes(need + need // 4 + 16).translate(table, rejected)
+    chars = chars[:total].decode('latin-1')
+    return [chars[i:i + length] for i in range(0, total, length)]
+
+
 def main():
     """
     Main Function
     """
     # command line arguments
-    short_options = 'l:o:ph'
-    long_options = ['length=', 'output=', 'print', 'help']
+    short_options = 'l:o:n:s:ph'
+    long_options = ['length=', 'output=', 'count=', 'seed=', 'print', 'help']
 
     # default values
     length = 10
     print_output = False
     output_file = None
+    count = None
+    seed = None
 
     arguments, values = getopt.getopt(sys.argv[1:], short_options, long_options)
 
@@ -38,6 +72,10 @@ def main():
             length = int(current_value)
         elif current_argument in ('-o', '--output'):
             output_file = current_value
+        elif current_argument in ('-n', '--count'):
+            count = int(current_value)
+        elif current_argument in ('-s', '--seed'):
+            seed = int(current_value)
         elif current_argument in ('-p', '--print'):
             print_output = True
         elif current_argument in ('-h', '--help'):
@@ -45,13 +83,18 @@ def main():
             print('Options:')
             print('  -l, --length=<length>')
             print('  -o, --output=<output_file>')
+            print('  -n, --count=<no. of keys> (bulk mode, one key per line)')
+            print('  -s, --seed=<seed> (bulk mode)')
             print('  -p, --print')
             print('  -h, --help')
             sys.exit(0) 
         else:
             raise ValueError(f'Invalid argument: {current_argument}')
 
-    key = generate_key(length)
+    if count is not None:
+        key = '\n'.join(generate_keys(count, length, seed))
+    else:
+        key = generate_key(length)
 
     # print the key
     if print_output:
@@ -6,8 +6,9 @@ alpha = 0b100011011 # reducing polynomial (x^8 + x^4 + x^3 + x + 1)
 g = 0b10 # generator (x + 1)
 
 # generator mappings
-g_exp = {}
-g_log = {}
+# (g_exp is doubled so that g_exp[g_log[a] + g_log[b]] needs no modulo)
+g_exp = bytearray(2 * (m - 1))
+g_log = bytearray(m) # g_log[0] is undefined (left as 0)
 
 
 def mul(self, a, b, alpha = alpha):
@@ -36,27 +37,41 @@ def precomp_gen_map():
     for i in range(1, m - 1):
         # compute g^i = g^(i-1) * g
         # multiply by g
-        g_exp[i] = (g_exp[i - 1] << 1) ^ g_exp[i - 1] # equivalent to multiplication by (x + 1)
+        val = (g_exp[i - 1] << 1) ^ g_exp[i - 1] # equivalent to multiplication by (x + 1)
         # if result is outside field, reduce it
-        if g_exp[i] & (1 << n):
-            g_exp[i] ^= alpha # equivalent to mod by alpha
+        if val & (1 << n):
+            val ^= alpha # equivalent to mod by alpha
+        g_exp[i] = val
 
         # save the reverse mapping
         g_log[g_exp[i]] = i
+    # second copy of the cycle (g^(i + m - 1) = g^i)
+    g_exp[m - 1:] = g_exp[:m - 1]
 
 # precompute the generator mappings
 precomp_gen_map()
+g_exp = bytes(g_exp)
+g_log = bytes(g_log)
 
 
 class GF256:
     """
     Class for members of Galois Field GF(2^n)
+    (instances are immutable, GF256(num) hands back one of the m pre-built elements)
     """
 
-    def __init__(self, num):
+    __slots__ = ('num',)
+
+    def __new__(cls, num):
         if num < 0 or num >= m:
             raise Exception(f"{num} is out of range of GF256")
-        self.num = num
+        return elements[num]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GF256 elements are immutable")
+
+    def __reduce__(self):
+        return (GF256, (self.num,))
 
     def __str__(self):
         return f'GF256({self.num:0{n}b})'
@@ -82,8 +97,10 @@ class GF256:
         """
         Addition in GF(2^n)
         """
+        if not isinstance(other, GF256):
+            return NotImplemented
         # equivalent to XOR operation
-        return GF256(self.num ^ other.num)
+        return elements[self.num ^ other.num]
 
     def __sub__(self, other):
         """
@@ -96,12 +113,12 @@ class GF256:
         """
         Multiply two numbers in the GF(2^n) finite field
         """
+        if not isinstance(other, GF256):
+            return NotImplemented
         a, b = self.num, other.num
         if a == 0 or b == 0:
-            res = 0
-        else:
-            res = g_exp[(g_log[a] + g_log[b]) % (m - 1)]
-        return GF256(res)
+            return elements[0]
+        return elements[g_exp[g_log[a] + g_log[b]]]
 
     def inverse(self):
         """
@@ -113,12 +130,14 @@ class GF256:
             raise Exception("Multiplicative inverse of 0 does not exist")
         else:
             res = g_exp[(m - 1) - g_log[a]]
-        return GF256(res)
+        return elements[res]
 
     def __truediv__(self, other):
         """
         Division of two numbers in GF(2^n) finite field
         """
+        if not isinstance(other, GF256):
+            return NotImplemented
         return self * other.inverse() # equivalent to multiplication by the inverse
 
     def __pow__(self, other):
@@ -132,7 +151,22 @@ class GF256:
                 raise Exception("Multiplicative inverse of 0 does not exist")
         else:
             res = g_exp[(g_log[a] * b) % (m - 1)]
-        return GF256(res)
+        return elements[res]
+
+
+def make_elements():
+    """
+    Build the m elements of the field (bypassing the GF256 factory)
+    """
+    res = []
+    for i in range(m):
+        x = object.__new__(GF256)
+        object.__setattr__(x, 'num', i)
+        res.append(x)
+    return tuple(res)
+
+# pre-built elements (GF256(i) is elements[i])
+elements = make_elements()
 
 
 def main():
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# This file contains GF256Array, a NumPy-backed array of GF(2^8) elements.
+# Elementwise arithmetic works on whole arrays with the same log/antilog
+# tables as GF256: a product is a gather from g_exp at g_log[a] + g_log[b],
+# with zero operands handled by a mask.
+
+import numpy as np
+from gf256 import GF256, m, g_exp, g_log
+
+# constants
+np_exp = np.frombuffer(g_exp, dtype=np.uint8) # doubled, indices up to 2 * (m - 2)
+np_log = np.frombuffer(g_log, dtype=np.uint8).astype(np.intp)
+
+
+class GF256Array:
+    """
+    Array of members of Galois Field GF(2^8)
+    """
+
+    def __init__(self, values):
+        if isinstance(values, GF256Array):
+            values = values.arr
+        elif isinstance(values, GF256):
+            values = values.num
+        elif isinstance(values, (list, tuple)):
+            values = [x.num if isinstance(x, GF256) else x for x in values]
+        arr = np.asarray(values)
+        if arr.dtype != np.uint8:
+            if arr.size and (arr.min() < 0 or arr.max() >= m):
+                raise Exception("Values are out of range of GF256")
+            arr = arr.astype(np.uint8)
+        self.arr = arr
+
+    @staticmethod
+    def operand(other):
+        """
+        Raw uint8 values of another operand (GF256Array, GF256 or array-like)
+        """
+        if isinstance(other, GF256Array):
+            return other.arr
+        if isinstance(other, GF256):
+            return np.uint8(other.num)
+        return GF256Array(other).arr
+
+    def __str__(self):
+        return f'GF256Array({self.arr})'
+
+    def __repr__(self):
+        return str(self)
+
+    def __len__(self):
+        return len(self.arr)
+
+    @property
+    def shape(self):
+        return self.arr.shape
+
+    def __getitem__(self, index):
+        res = self.arr[index]
+        if isinstance(res, np.ndarray):
+            return GF256Array(res)
+        return GF256(int(res))
+
+    def __setitem__(self, index, value):
+        self.arr[index] = self.operand(value)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self):
+        """
+        Nested list of GF256 elements
+        """
+        return np.vectorize(lambda x: GF256(int(x)), otypes=[object])(self.arr).tolist()
+
+    def __add__(self, other):
+        """
+        Addition in GF(2^8)
+        """
+        return GF256Array(self.arr ^ self.operand(other))
+
+    __radd__ = __add__
+    __sub__ = __add__ # in GF(2^n), subtraction is the same as addition
+    __rsub__ = __add__
+
+    def __mul__(self, other):
+        """
+        Elementwise multiplication in GF(2^8)
+        """
+        a, b = np.broadcast_arrays(self.arr, self.operand(other))
+        res = np.where((a == 0) | (b == 0), np.uint8(0), np_exp[np_log[a] + np_log[b]])
+        return GF256Array(res)
+
+    __rmul__ = __mul__
+
+    def inverse(self):
+        """
+        Elementwise multiplicative inverse in GF(2^8)
+        """
+        if (self.arr == 0).any():
+            raise Exception("Multiplicative inverse of 0 does not exist")
+        return GF256Array(np_exp[(m - 1) - np_log[self.arr]])
+
+    def __truediv__(self, other):
+        """
+        Elementwise division in GF(2^8)
+        """
+        return self * GF256Array(self.operand(other)).inverse()
+
+    def __rtruediv__(self, other):
+        return GF256Array(self.operand(other)) * self.inverse()
+
+    def __pow__(self, exp):
+        """
+        Elementwise exponentiation in GF(2^8) (exp is an int or a GF256)
+        """
+        if isinstance(exp, GF256):
+            exp = exp.num
+        a = self.arr
+        zero = a == 0
+        if exp <= 0 and zero.any():
+            raise Exception("Multiplicative inverse of 0 does not exist")
+        res = np.where(zero, np.uint8(0), np_exp[(np_log[a] * exp) % (m - 1)]) # map 0^k = 0 (k > 0)
+        return GF256Array(res)
+
+
+def main():
+    a = GF256Array(np.random.randint(0, 256, size=1 << 20, dtype=np.uint8))
+    b = GF256Array(np.random.randint(1, 256, size=1 << 20, dtype=np.uint8))
+    c = a * b
+    print('Elementwise product matches GF256:', all((a[i] * b[i]).num == c[i].num for i in range(1000)))
+    print('(a * b) / b == a:', np.array_equal((c / b).arr, a.arr))
+    print('Scaled by GF256(0x53):', (GF256Array([1, 2, 3, 0xCA]) * GF256(0x53)))
+
+
+if __name__ == '__main__':
+    main()
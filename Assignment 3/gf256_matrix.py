@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# This file contains linear algebra over GF(2^8) (the field of gf256.py)
+# on NumPy uint8 matrices.
+#
+# A full 256 x 256 multiplication table is precomputed, so row mul_table[c] maps
+# every field element to its product with c, and scaling a whole row (or a column
+# of factors against a row) is a single gather. Addition is XOR, so Gaussian
+# elimination clears a pivot column from all other rows at once.
+
+import time
+import numpy as np
+from gf256 import GF256
+from gf256_array import GF256Array, np_exp, np_log
+
+# constants
+mul_table = np_exp[np_log[:, None] + np_log[None, :]]
+mul_table[0, :] = 0
+mul_table[:, 0] = 0
+inv_table = np.zeros(256, dtype=np.uint8)
+inv_table[1:] = np_exp[255 - np_log[1:]]
+
+
+def as_matrix(a):
+    """
+    uint8 array of a matrix given as a GF256Array, nested lists of ints or GF256, or an array
+    """
+    if isinstance(a, GF256Array):
+        return a.arr
+    if not isinstance(a, np.ndarray):
+        a = np.vectorize(lambda x: x.num if isinstance(x, GF256) else x, otypes=[np.int64])(a)
+    return GF256Array(a).arr
+
+
+def identity(n):
+    """
+    n x n identity matrix
+    """
+    return np.eye(n, dtype=np.uint8)
+
+
+def mat_mul(a, b):
+    """
+    Product of an (r, k) and a (k, c) matrix
+    (a column of a against a row of b per step: k gathers of r x c products)
+    """
+    a, b = as_matrix(a), as_matrix(b)
+    if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[0]:
+        raise ValueError(f"Cannot multiply matrices of shapes {a.shape} and {b.shape}")
+    res = np.zeros((a.shape[0], b.shape[1]), dtype=np.uint8)
+    for j in range(a.shape[1]):
+        res ^= mul_table[a[:, j, None], b[None, j, :]]
+    return res
+
+
+def row_reduce(a):
+    """
+    Reduced row echelon form of a matrix
+    Returns the reduced matrix and the list of pivot columns.
+    """
+    a = as_matrix(a).copy()
+    rows, cols = a.shape
+    pivots = []
+    r = 0
+    for c in range(cols):
+        if r == rows:
+            break
+        nonzero = np.flatnonzero(a[r:, c])
+        if len(nonzero) == 0:
+            continue
+        p = r + nonzero[0]
+        if p != r:
+            a[[r, p]] = a[[p, r]]
+        # the pivot row is zero left of c, so only columns c.. change
+        a[r, c:] = mul_table[inv_table[a[r, c]], a[r, c:]] # normalize the pivot to 1
+        factors = a[:, c].copy()
+        factors[r] = 0
+        a[:, c:] ^= mul_table[factors[:, None], a[None, r, c:]] # clear column c in every other row
+        pivots.append(c)
+        r += 1
+    return a, pivots
+
+
+def rank(a):
+    """
+    Rank of a matrix
+    """
+    return len(row_reduce(a)[1])
+
+
+def solve(a, b):
+    """
+    Solve a x = b for a square, non-singular a
+    (b is a vector or a matrix with one right-hand side per column)
+    """
+    a, b = as_matrix(a), as_matrix(b)
+    n = a.shape[0]
+    if a.shape != (n, n) or b.shape[0] != n:
+        raise ValueError(f"Cannot solve a system of shapes {a.shape} and {b.shape}")
+    vector = b.ndim == 1
+    aug = np.hstack([a, b[:, None] if vector else b])
+    res, pivots = row_reduce(aug)
+    if pivots[:n] != list(range(n)):
+        raise ValueError("Matrix is singular")
+    res = res[:, n:]
+    return res[:, 0] if vector else res
+
+
+def inverse(a):
+    """
+    Inverse of a square, non-singular matrix
+    """
+    a = as_matrix(a)
+    return solve(a, identity(a.shape[0]))
+
+
+def main():
+    # MixColumns matrix of AES and its inverse
+    mix = [[2, 3, 1, 1], [1, 2, 3, 1], [1, 1, 2, 3], [3, 1, 1, 2]]
+    print('Inverse of the MixColumns matrix:')
+    print(inverse(mix))
+
+    n = 256
+    rng = np.random.default_rng()
+    a = rng.integers(0, 256, (n, n), dtype=np.uint8)
+    x = rng.integers(0, 256, n, dtype=np.uint8)
+    b = mat_mul(a, x[:, None])[:, 0]
+    start = time.perf_counter()
+    res = solve(a, b)
+    elapsed = time.perf_counter() - start
+    print('Rank of a random %d x %d matrix: %d' % (n, n, rank(a)))
+    print('Solved in %.1f ms, correct: %s' % (elapsed * 1e3, np.array_equal(res, x)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,251 @@
+from polynomials import is_irreducible, modulus, prime_factors, spread
+
+max_table_bits = 16 # largest n with log/antilog tables
+large_field_bits = 32 # smallest n with the carry-less multiplication backend (sparse moduli)
+karatsuba_bits = 2048 # operands longer than this are split by Karatsuba
+window_bits = 4
+max_generator_tries = 64
+
+fields = {} # (n, m) -> field
+
+
+def clmul(a, b):
+    # carry-less product of two polynomials
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    if b.bit_length() > karatsuba_bits:
+        k = a.bit_length() // 2
+        mask = (1 << k) - 1
+        a0, a1, b0, b1 = a & mask, a >> k, b & mask, b >> k
+        lo = clmul(a0, b0)
+        hi = clmul(a1, b1)
+        mid = clmul(a0 ^ a1, b0 ^ b1) ^ lo ^ hi
+        return (hi << (2 * k)) ^ (mid << k) ^ lo
+    # left-to-right comb over 4-bit windows of b, with t[j] = a * j precomputed
+    t = [0] * 16
+    t[1] = a
+    for j in range(2, 16):
+        t[j] = t[j - 1] ^ a if j & 1 else t[j >> 1] << 1
+    p = 0
+    for k in range((b.bit_length() - 1) // 4 * 4, -1, -4):
+        p = (p << 4) ^ t[(b >> k) & 15]
+    return p
+
+
+def clsquare(a):
+    # carry-less square (a linear map: every bit i moves to 2i)
+    res = 0
+    i = 0
+    while a:
+        res |= spread[a & 0xFF] << i
+        a >>= 8
+        i += 16
+    return res
+
+
+class field:
+    # Arithmetic of one GF(2^n) with modulus m, shared by all its elements.
+    # With a generator g, a * b = g^(log a + log b), so multiplication, division
+    # and powers become table lookups. Without tables (n too large, or no generator
+    # among the first candidates) products are computed 4 bits of b at a time.
+    # Large fields with a trinomial or pentanomial modulus (GHASH, binary curves)
+    # instead take the full carry-less product and reduce it afterwards by folding
+    # the bits above n onto the few low terms of m.
+
+    def __init__(self, n, m):
+        assert(is_irreducible(m))
+        self.n = n
+        self.m = m
+        self.order = (1 << n) - 1
+
+        # red[h] cancels the overflow h * x^n of a product shifted by one window
+        self.red = [(h << n) ^ self.reduce(h << n) for h in range(1 << window_bits)]
+
+        self.exp = self.log = None
+        self.generator = None
+        if n <= max_table_bits:
+            self.build_tables()
+
+        if self.exp is not None:
+            self.mul, self.div, self.pow, self.inv = self.mul_table, self.div_table, self.pow_table, self.inv_table
+        elif n >= large_field_bits and bin(m).count('1') <= 5:
+            self.mask = (1 << n) - 1
+            self.taps = [k for k in range(n) if m >> k & 1] # low terms of m
+            self.mul, self.div, self.pow, self.inv = self.mul_large, self.div_large, self.pow_large, self.inv_window
+        else:
+            self.mul, self.div, self.pow, self.inv = self.mul_window, self.div_window, self.pow_window, self.inv_window
+
+    def reduce(self, a):
+        # a mod m for a polynomial a of any degree
+        while a.bit_length() > self.n:
+            a ^= self.m << (a.bit_length() - self.n - 1)
+        return a
+
+    def reduce_sparse(self, c):
+        # x^n = sum of the low terms of m, fold the bits above n down until none are left
+        n, mask, taps = self.n, self.mask, self.taps
+        while c >> n:
+            hi = c >> n
+            c &= mask
+            for k in taps:
+                c ^= hi << k
+        return c
+
+    def mul_large(self, a, b):
+        if a == b:
+            return self.reduce_sparse(clsquare(a))
+        return self.reduce_sparse(clmul(a, b))
+
+    def pow_large(self, a, exp):
+        if exp < 0:
+            a, exp = self.inv_window(a), -exp
+        res = 1
+        for bit in bin(exp)[2:]:
+            res = self.reduce_sparse(clsquare(res))
+            if bit == '1':
+                res = self.reduce_sparse(clmul(res, a))
+        return res
+
+    def div_large(self, a, b):
+        return self.mul_large(a, self.inv_window(b))
+
+    def find_generator(self):
+        checks = [self.order // p for p in prime_factors(self.order)]
+        for g in range(2, min(self.order + 1, max_generator_tries + 2)):
+            if self.pow_window(g, self.order) == 1 and all(self.pow_window(g, e) != 1 for e in checks):
+                return g
+        return None
+
+    def build_tables(self):
+        g = 1
+        if self.order > 1:
+            g = self.find_generator()
+            if g is None:
+                return
+        # exp is doubled so that exp[log a + log b] needs no reduction
+        exp = [0] * (2 * self.order)
+        log = [0] * (self.order + 1)
+        val = 1
+        for i in range(self.order):
+            exp[i] = exp[i + self.order] = val
+            log[val] = i
+            val = self.mul_window(val, g)
+        self.exp, self.log, self.generator = exp, log, g
+
+    def mul_window(self, a, b):
+        n, red = self.n, self.red
+        # t[j] = a * j for every window value j
+        t = [0] * (1 << window_bits)
+        t[1] = a
+        for j in range(2, 1 << window_bits):
+            if j & 1:
+                t[j] = t[j - 1] ^ a
+            else:
+                x = t[j >> 1] << 1
+                t[j] = x ^ self.m if x >> n else x
+        p = 0
+        mask = (1 << window_bits) - 1
+        for k in range((n - 1) // window_bits * window_bits, -1, -window_bits):
+            p <<= window_bits
+            p ^= red[p >> n]
+            p ^= t[(b >> k) & mask]
+        return p
+
+    def pow_window(self, a, exp):
+        if exp < 0:
+            a, exp = self.inv_window(a), -exp
+        res = 1
+        while exp != 0:
+            if exp & 1:
+                res = self.mul_window(res, a)
+            exp >>= 1
+            a = self.mul_window(a, a)
+        return res
+
+    def inv_window(self, a):
+        # binary extended Euclidean algorithm on polynomials:
+        # keeps g1 * a = u and g2 * a = v (mod m) while shrinking u and v to 1
+        if a == 0:
+            raise ZeroDivisionError("0 has no multiplicative inverse")
+        m = self.m
+        u, v = a, m
+        g1, g2 = 1, 0
+        while u != 1 and v != 1:
+            while u & 1 == 0:
+                u >>= 1
+                g1 = (g1 ^ m) >> 1 if g1 & 1 else g1 >> 1
+            while v & 1 == 0:
+                v >>= 1
+                g2 = (g2 ^ m) >> 1 if g2 & 1 else g2 >> 1
+            if u.bit_length() > v.bit_length():
+                u ^= v
+                g1 ^= g2
+            else:
+                v ^= u
+                g2 ^= g1
+            if u == 0 or v == 0:
+                raise ZeroDivisionError(f"{a:#x} is not invertible modulo {m:#x}")
+        return g1 if u == 1 else g2
+
+    def batch_inv(self, values):
+        # Montgomery's trick: one inversion and 3(k - 1) multiplications for k values
+        if not values:
+            return []
+        prefix = [values[0]]
+        for x in values[1:]:
+            prefix.append(self.mul(prefix[-1], x))
+        acc = self.inv(prefix[-1])
+        res = [0] * len(values)
+        for i in range(len(values) - 1, 0, -1):
+            res[i] = self.mul(acc, prefix[i - 1])
+            acc = self.mul(acc, values[i])
+        res[0] = acc
+        return res
+
+    def div_window(self, a, b):
+        return self.mul_window(a, self.inv_window(b))
+
+    def mul_table(self, a, b):
+        if a == 0 or b == 0:
+            return 0
+        return self.exp[self.log[a] + self.log[b]]
+
+    def inv_table(self, a):
+        if a == 0:
+            raise ZeroDivisionError("0 has no multiplicative inverse")
+        return self.exp[self.order - self.log[a]]
+
+    def div_table(self, a, b):
+        if b == 0:
+            raise ZeroDivisionError("0 has no multiplicative inverse")
+        if a == 0:
+            return 0
+        return self.exp[self.log[a] - self.log[b] + self.order]
+
+    def pow_table(self, a, exp):
+        if a == 0:
+            if exp < 0:
+                raise ZeroDivisionError("0 has no multiplicative inverse")
+            return 1 if exp == 0 else 0
+        return self.exp[self.log[a] * exp % self.order]
+
+
+def get_field(n, m):
+    f = fields.get((n, m))
+    if f is None:
+        f = fields[(n, m)] = field(n, m)
+    return f
+
+
 class gf2n:
-    def __init__(self, val, n = 8, m = 0b100011011):
+    def __init__(self, val, n = 8, m = None):
+        if m is None:
+            m = modulus(n) # lowest-weight irreducible polynomial (0b100011011 for n = 8)
         assert(n > 0 and m.bit_length() == n+1 and val.bit_length() <= n)
         self.n = n
         self.m = m
         self.val = val
+        self.field = get_field(n, m)
 
     def bin(self):
         return f'{self.val:0{self.n}b}'
@@ -49,18 +291,27 @@ class gf2n:
 
     def __mul__(self, other):
         assert(self.n == other.n and self.m == other.m)
-        res = gf2n._mul(self.val, other.val, self.n, self.m)
+        res = self.field.mul(self.val, other.val)
         return gf2n(res, self.n, self.m)
 
     def __pow__(self, exp):
-        res = gf2n._bigmod(self.val, exp, self.n, self.m)
+        res = self.field.pow(self.val, exp)
         return gf2n(res, self.n, self.m)
 
     def inv(self):
-        return self ** (2 ** self.n - 2)
+        return gf2n(self.field.inv(self.val), self.n, self.m)
 
     def __truediv__(self, other):
-        return self * other.inv()
+        assert(self.n == other.n and self.m == other.m)
+        res = self.field.div(self.val, other.val)
+        return gf2n(res, self.n, self.m)
+
+def batch_inv(values):
+    if not values:
+        return []
+    n, m = values[0].n, values[0].m
+    assert(all(x.n == n and x.m == m for x in values))
+    return [gf2n(x, n, m) for x in get_field(n, m).batch_inv([x.val for x in values])]
 
 class gf8(gf2n):
     def __init__(self, val, m = 0b1011):
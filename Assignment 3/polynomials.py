@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+
+# This file contains a finder for irreducible and primitive polynomials over GF(2)
+# (polynomials are ints, bit i is the coefficient of x^i) and an on-disk catalog of
+# the lowest-weight ones for every degree.
+#
+# Irreducibility is checked with Ben-Or's test: m of degree n is irreducible iff
+# gcd(x^(2^i) - x, m) = 1 for i = 1..n/2, where x^(2^i) mod m comes from repeated
+# squaring. Most reducible polynomials have a small factor and fail after a few steps.
+# An irreducible m is primitive iff x^((2^n - 1) / p) != 1 mod m for every prime p
+# dividing 2^n - 1, so primitivity needs the factorization of 2^n - 1, found from
+# its cyclotomic factors Phi_d(2) with trial division, Pollard's p - 1 (the prime
+# factors of Phi_d(2) are 1 mod d) and Pollard's rho within a budget, plus a table
+# of known large factors that these methods cannot reach.
+
+import os
+import sys
+import json
+import math
+import time
+import getopt
+import random
+from functools import lru_cache
+
+# constants
+catalog_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'polynomials.json')
+rho_budget = 1 << 20 # iterations of Pollard's rho per factor
+pm1_bound = 100000 # stage 1 bound of Pollard's p - 1
+small_primes = [p for p in range(2, 1000) if all(p % q for q in range(2, int(p ** 0.5) + 1))]
+# large prime factors of Phi_d(2) (keyed by d) out of reach of p - 1 and rho
+# (each is checked to divide and to be prime before it is used)
+known_factors = {
+    101: [7432339208719, 341117531003194129],
+    137: [32032215596496435569, 5439042183600204290159],
+    149: [86656268566282183151, 8235109336690846723986161],
+    157: [1654058017289, 2134387368610417],
+    173: [70084436712553223, 155285743288572277679887],
+    185: [1587855697992791, 7248808599285760001152755641],
+    193: [61654440233248340616559, 14732265321145317331353282383],
+    199: [4884164093883941177660049098586324302977543600799],
+    206: [8142767081771726171],
+    207: [2232578641663, 42166482463639],
+    209: [94803416684681, 1512348937147247, 5346950541323960232319657],
+    211: [60272956433838849161, 3593875704495823757388199894268773153439],
+    213: [2849881972114740679, 4205268574191396793],
+    217: [6268703933840364033151, 378428804431424484082633],
+    219: [671165898617413417, 4815314615204347717321],
+    223: [1469495262398780123809, 596242599987116128415063],
+    227: [26986333437777017, 7992177738205979626491506950867720953545660121688631],
+    229: [59833457464970183, 467795120187583723534280000348743236593],
+    237: [23728823512345609279, 31357373417090093431],
+    243: [16753783618801, 192971705688577, 3712990163251158343],
+    247: [6459570124697, 402004106269663, 1282816117617265060453496956212169],
+    251: [178230287214063289511, 61676882198695257501367, 12070396178249893039969681],
+    253: [199957736328435366769577, 44667711762797798403039426178361],
+    256: [59649589127497217, 5704689200685129054721],
+    257: [535006138814359, 1155685395246619182673033, 374550598501810936581776630096313181393],
+    263: [13572264529177, 120226360536848498024035943, 383725126655170964501315730676446647],
+    267: [28753302853087, 24124332437713924084267316537353],
+    274: [32127963626435681, 105498212027592977],
+    273: [4093204977277417, 86977595801949844993],
+    275: [382027665134363932751, 4074891477354886815033308087379995347151],
+    276: [5415624023749, 70334392823809],
+    279: [833732508401263, 2034439836951867299888617],
+    285: [1491477035689218775711, 25349242986637720573561],
+    289: [179058312604392742511009, 3320934994356628805321733520790947608989420068445023],
+    292: [649301712182209, 9444732965601851473921],
+    293: [40122362455616221971122353, 396645227028138890415611220710757921643910743103031701971222447],
+    295: [452824604065751, 4410975230650827973711],
+    299: [13444476836590589479, 51441563151591093599, 260242449712509916159],
+}
+# square of a byte as a polynomial: bits spread apart with zeros in between
+spread = [int(f'{i:b}', 4) for i in range(256)]
+
+
+class Modulus:
+    """
+    Arithmetic of polynomials modulo m
+    """
+
+    def __init__(self, m):
+        self.m = m
+        self.n = n = m.bit_length() - 1
+        # red[h] = h * x^n + (h * x^n mod m): clears the top 8 bits h of a polynomial
+        r = [0] * 256
+        r[1] = m ^ (1 << n)
+        for h in range(2, 256):
+            if h & 1:
+                r[h] = r[h - 1] ^ r[1]
+            else:
+                v = r[h >> 1] << 1
+                r[h] = v ^ m if v >> n else v
+        self.red = [(h << n) ^ r[h] for h in range(256)]
+
+    def reduce(self, c):
+        n, red = self.n, self.red
+        while c >> n:
+            s = max(c.bit_length() - n - 8, 0)
+            c ^= red[c >> (n + s)] << s
+        return c
+
+    def square(self, a):
+        res = 0
+        i = 0
+        while a:
+            res |= spread[a & 0xFF] << i
+            a >>= 8
+            i += 16
+        return self.reduce(res)
+
+    def pow_x(self, e):
+        """
+        x^e mod m
+        """
+        res = 1
+        for bit in bin(e)[2:]:
+            res = self.square(res)
+            if bit == '1':
+                res = self.reduce(res << 1)
+        return res
+
+
+def poly_gcd(a, b):
+    """
+    Greatest common divisor of two polynomials
+    """
+    while b:
+        while a.bit_length() >= b.bit_length():
+            a ^= b << (a.bit_length() - b.bit_length())
+        a, b = b, a
+    return a
+
+
+def is_irreducible(m):
+    """
+    Ben-Or's irreducibility test
+    """
+    n = m.bit_length() - 1
+    if n < 1:
+        return False
+    if n == 1:
+        return True
+    if not m & 1: # divisible by x
+        return False
+    mod = Modulus(m)
+    u = 2 # x
+    for _ in range(n // 2):
+        u = mod.square(u)
+        if poly_gcd(m, u ^ 2) != 1:
+            return False
+    return True
+
+
+def is_probable_prime(x):
+    """
+    Miller-Rabin test (deterministic below 3.3 * 10^24)
+    """
+    if x < 2:
+        return False
+    for p in small_primes[:13]:
+        if x % p == 0:
+            return x == p
+    d, s = x - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small_primes[:13]:
+        y = pow(a, d, x)
+        if y == 1 or y == x - 1:
+            continue
+        for _ in range(s - 1):
+            y = y * y % x
+            if y == x - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollard_rho(x, budget = rho_budget):
+    """
+    A non-trivial factor of the composite x (Brent's variant), or None within the budget
+    """
+    rng = random.Random(x)
+    while True:
+        y, c = rng.randrange(1, x), rng.randrange(1, x)
+        g, r, q = 1, 1, 1
+        while g == 1:
+            z = y
+            for _ in range(r):
+                y = (y * y + c) % x
+            budget -= 2 * r # iterations of this pass, y is advanced r times twice
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % x
+                    q = q * abs(z - y) % x
+                g = math.gcd(q, x)
+                k += 128
+            r *= 2
+            if budget < 0:
+                return None
+        if g == x: # the batched gcd overshot, step back one at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % x
+                g = math.gcd(abs(z - ys), x)
+        if g != x:
+            return g
+
+
+def pollard_pm1(x, d = 1, bound = pm1_bound):
+    """
+    A non-trivial factor p of x with p - 1 | 2d * (bound-smooth number), or None
+    """
+    a = pow(3, 2 * d, x)
+    for p in primes_below(bound):
+        pe = p
+        while pe * p <= bound:
+            pe *= p
+        a = pow(a, pe, x)
+    g = math.gcd(a - 1, x)
+    return g if 1 < g < x else None
+
+
+@lru_cache(maxsize=None)
+def primes_below(bound):
+    sieve = bytearray([1]) * (bound + 1)
+    sieve[0:2] = b'\0\0'
+    for i in range(2, int(bound ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, bound + 1, i)))
+    return [i for i in range(bound + 1) if sieve[i]]
+
+
+def prime_factors(x, budget = rho_budget, d = 1):
+    """
+    Distinct prime factors of x, or None if x could not be factored within the budget
+    (d is a hint that every prime factor is 1 mod d)
+    """
+    res = set()
+    for p in known_factors.get(d, ()) if d > 1 else ():
+        if x % p == 0 and is_probable_prime(p):
+            res.add(p)
+            while x % p == 0:
+                x //= p
+    for p in small_primes:
+        if x % p == 0:
+            res.add(p)
+            while x % p == 0:
+                x //= p
+    stack = [x] if x > 1 else []
+    while stack:
+        y = stack.pop()
+        if is_probable_prime(y):
+            res.add(y)
+            continue
+        f = pollard_pm1(y, d) or pollard_rho(y, budget)
+        if f is None:
+            return None
+        stack += [f, y // f]
+    return sorted(res)
+
+
+def divisors(n):
+    return [d for d in range(1, n + 1) if n % d == 0]
+
+
+def mobius(n):
+    res = 1
+    for p in small_primes:
+        if p * p > n:
+            break
+        if n % p == 0:
+            n //= p
+            if n % p == 0:
+                return 0
+            res = -res
+    return -res if n > 1 else res
+
+
+@lru_cache(maxsize=None)
+def cyclotomic_factors(d, budget = rho_budget):
+    """
+    Distinct prime factors of Phi_d(2), or None if they could not be found
+    """
+    num, den = 1, 1
+    for e in divisors(d):
+        mu = mobius(d // e)
+        if mu == 1:
+            num *= (1 << e) - 1
+        elif mu == -1:
+            den *= (1 << e) - 1
+    return prime_factors(num // den, budget, d)
+
+
+@lru_cache(maxsize=None)
+def order_factors(n, budget = rho_budget):
+    """
+    Distinct prime factors of 2^n - 1, or None if they could not be found
+    (2^n - 1 is the product of the cyclotomic values Phi_d(2) for d | n, factored one by one)
+    """
+    res = set()
+    for d in divisors(n):
+        f = cyclotomic_factors(d, budget)
+        if f is None:
+            return None
+        res.update(f)
+    return sorted(res)
+
+
+def is_primitive(m, factors = None):
+    """
+    Whether m is a primitive polynomial (None if 2^n - 1 could not be factored)
+    """
+    if not is_irreducible(m):
+        return False
+    n = m.bit_length() - 1
+    if factors is None:
+        factors = order_factors(n)
+        if factors is None:
+            return None
+    order = (1 << n) - 1
+    mod = Modulus(m)
+    if mod.pow_x(order) != 1: # x is not even a unit (m = x)
+        return False
+    return all(mod.pow_x(order // p) != 1 for p in factors)
+
+
+def from_terms(terms):
+    return sum(1 << e for e in terms)
+
+
+def to_terms(m):
+    return [e for e in range(m.bit_length() - 1, -1, -1) if m >> e & 1]
+
+
+def candidates(n):
+    """
+    Polynomials of degree n by increasing weight: trinomials x^n + x^a + 1,
+    then pentanomials x^n + x^a + x^b + x^c + 1 (a > b > c, smallest a first)
+    """
+    top = (1 << n) | 1
+    if n == 1:
+        yield 0b10
+        yield 0b11
+    for a in range(1, n):
+        yield top | (1 << a)
+    for a in range(3, n):
+        for b in range(2, a):
+            for c in range(1, b):
+                yield top | (1 << a) | (1 << b) | (1 << c)
+
+
+def search(n, primitive = False):
+    """
+    Lowest-weight irreducible (or primitive) polynomial of degree n
+    (None if primitivity cannot be decided)
+    """
+    if primitive:
+        factors = order_factors(n)
+        if factors is None:
+            return None
+    for m in candidates(n):
+        if is_irreducible(m) and (not primitive or is_primitive(m, factors)):
+            return m
+    # every degree has an irreducible trinomial or pentanomial in practice,
+    # fall back to a full search
+    for m in range((1 << n) | 1, 1 << (n + 1), 2):
+        if is_irreducible(m) and (not primitive or is_primitive(m, factors)):
+            return m
+
+
+def load_catalog(path = catalog_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {int(n): entry for n, entry in json.load(f).items()}
+
+
+def save_catalog(catalog, path = catalog_path):
+    # written to a temporary file first, so readers never see a partial catalog
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({str(n): catalog[n] for n in sorted(catalog)}, f, indent=1)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def fill_entry(entry, n, primitive = False):
+    """
+    Add the missing polynomials of degree n to a catalog entry
+    (stored as lists of exponents, the primitive one is None if 2^n - 1 could not be factored)
+    Returns whether the entry changed.
+    """
+    changed = False
+    if 'irreducible' not in entry:
+        entry['irreducible'] = to_terms(search(n))
+        changed = True
+    if primitive and 'primitive' not in entry:
+        prim = search(n, primitive=True)
+        entry['primitive'] = to_terms(prim) if prim is not None else None
+        changed = True
+    return changed
+
+
+_catalog = None # loaded on first use
+
+
+def catalog_entry(n, primitive = False):
+    """
+    Catalog entry of degree n, completed if something is missing
+    (missing entries are only kept in memory, the file is written by main)
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    entry = _catalog.setdefault(n, {})
+    fill_entry(entry, n, primitive)
+    return entry
+
+
+def modulus(n, primitive = False):
+    """
+    Lowest-weight irreducible (or primitive, if known) polynomial of degree n
+    """
+    entry = catalog_entry(n, primitive)
+    if primitive and entry['primitive'] is not None:
+        return from_terms(entry['primitive'])
+    return from_terms(entry['irreducible'])
+
+
+def main():
+    usage = 'Usage: python polynomials.py [-n <max degree>] [-o <catalog>]'
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'n:o:h')
+    except getopt.GetoptError:
+        print(usage)
+        sys.exit(2)
+    max_n, path = 64, catalog_path
+    for opt, arg in opts:
+        if opt == '-h':
+            print(usage)
+            sys.exit()
+        elif opt == '-n':
+            max_n = int(arg)
+        elif opt == '-o':
+            path = arg
+
+    catalog = load_catalog(path)
+    start = time.perf_counter()
+    for n in range(1, max_n + 1):
+        fill_entry(catalog.setdefault(n, {}), n, primitive=True)
+        entry = catalog[n]
+        print(n, entry['irreducible'], entry['primitive'])
+    save_catalog(catalog, path)
+    print('Catalog of degrees 1..%d saved to %s (%.1fs)' % (max_n, path, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+# This file contains systematic Reed-Solomon erasure coding over GF(2^8) (AES polynomial).
+#
+# Data is split into k shards and m parity shards are added, so that any k of the
+# k + m shards are enough to rebuild the data. The (k + m) x k encoding matrix has
+# the identity on top (data shards are stored as they are) and m rows below such that
+# any k rows are invertible: a Cauchy matrix, or a Vandermonde matrix made systematic.
+# Every coefficient c is applied to the bytes of a shard as a gather from mul_table[c],
+# the 256-entry table of products with c.
+
+import os
+import time
+import tempfile
+import numpy as np
+from functools import lru_cache
+from gf256_matrix import mul_table, inv_table, identity, inverse, mat_mul
+
+# constants
+chunk_size = 1 << 20 # bytes per shard per stripe when streaming
+block_size = 1 << 16 # columns of shards processed at a time
+
+
+def cauchy_matrix(k, m):
+    """
+    m x k Cauchy matrix 1 / (x_i + y_j) with x_i = k + i and y_j = j
+    """
+    x = np.arange(k, k + m, dtype=np.uint8)[:, None]
+    y = np.arange(k, dtype=np.uint8)[None, :]
+    return inv_table[x ^ y]
+
+
+def vandermonde_matrix(k, m):
+    """
+    m x k parity rows of a Vandermonde matrix i^j made systematic
+    (multiplied by the inverse of its top k x k block)
+    """
+    v = np.zeros((k + m, k), dtype=np.uint8)
+    v[:, 0] = 1
+    points = np.arange(k + m, dtype=np.uint8)
+    for j in range(1, k):
+        v[:, j] = mul_table[v[:, j - 1], points]
+    return mat_mul(v, inverse(v[:k]))[k:]
+
+
+def apply_matrix(mat, shards):
+    """
+    Rows of mat applied to a (k, s) array of shards, returning a (rows, s) array
+    (in blocks of columns, so the gathered products stay in the cache)
+    """
+    res = np.zeros((mat.shape[0], shards.shape[1]), dtype=np.uint8)
+    coeffs = mat.tolist()
+    buf = np.empty(block_size, dtype=np.uint8)
+    for off in range(0, shards.shape[1], block_size):
+        src = shards[:, off:off + block_size]
+        tmp = buf[:src.shape[1]]
+        for i, row in enumerate(coeffs):
+            out = res[i, off:off + block_size]
+            for j, c in enumerate(row):
+                if c == 1:
+                    out ^= src[j]
+                elif c != 0:
+                    np.take(mul_table[c], src[j], out=tmp)
+                    out ^= tmp
+    return res
+
+
+class ReedSolomon:
+    """
+    Reed-Solomon code with k data shards and m parity shards
+    """
+
+    def __init__(self, k, m, matrix = 'cauchy'):
+        if k <= 0 or m < 0 or k + m > 256:
+            raise ValueError(f"Invalid no. of shards: {k} + {m}")
+        self.k = k
+        self.m = m
+        if matrix == 'cauchy':
+            self.parity = cauchy_matrix(k, m)
+        elif matrix == 'vandermonde':
+            self.parity = vandermonde_matrix(k, m)
+        else:
+            raise ValueError(f"Unknown matrix: {matrix}")
+        self.matrix = np.vstack([identity(k), self.parity])
+        self.decode_matrix = lru_cache(maxsize=64)(self.decode_matrix)
+
+    def shard_size(self, size):
+        """
+        Shard length for size bytes of data
+        """
+        return -(-size // self.k)
+
+    def split(self, data):
+        """
+        (k, s) array of data shards (the last one padded with zeros)
+        """
+        data = np.frombuffer(data, dtype=np.uint8)
+        s = self.shard_size(len(data))
+        shards = np.zeros(self.k * s, dtype=np.uint8)
+        shards[:len(data)] = data
+        return shards.reshape(self.k, s)
+
+    def encode_shards(self, shards):
+        """
+        (m, s) array of parity shards for a (k, s) array of data shards
+        """
+        return apply_matrix(self.parity, shards)
+
+    def decode_matrix(self, present):
+        """
+        Matrix rebuilding the data shards from the shards with the (sorted) indices present
+        """
+        return inverse(self.matrix[list(present)])
+
+    def reconstruct(self, shards):
+        """
+        (k, s) array of data shards from a list of k + m shards (None for a missing one)
+        """
+        if len(shards) != self.k + self.m:
+            raise ValueError(f"Expected {self.k + self.m} shards, got {len(shards)}")
+        present = [i for i, x in enumerate(shards) if x is not None][:self.k]
+        if len(present) < self.k:
+            raise ValueError(f"At least {self.k} shards are needed, got {len(present)}")
+        avail = np.stack([np.frombuffer(shards[i], dtype=np.uint8) for i in present])
+        missing = [j for j in range(self.k) if shards[j] is None]
+        if not missing:
+            return avail
+        # surviving data shards are kept, only the missing rows of the inverse are applied
+        res = np.empty((self.k, avail.shape[1]), dtype=np.uint8)
+        for pos, i in enumerate(present):
+            if i < self.k:
+                res[i] = avail[pos]
+        res[missing] = apply_matrix(self.decode_matrix(tuple(present))[missing], avail)
+        return res
+
+    def encode(self, data):
+        """
+        Split data into k + m shards
+        """
+        data_shards = self.split(data)
+        parity = self.encode_shards(data_shards)
+        return [x.tobytes() for x in data_shards] + [x.tobytes() for x in parity]
+
+    def decode(self, shards, size):
+        """
+        Rebuild size bytes of data from any k of the shards (None for a missing one)
+        """
+        return self.reconstruct(shards).tobytes()[:size]
+
+    def encode_stream(self, fin, fouts, size = chunk_size):
+        """
+        Encode a file stripe by stripe, writing shard i to fouts[i]
+        Returns the no. of bytes of data.
+        """
+        total = 0
+        while True:
+            data = fin.read(self.k * size)
+            if not data:
+                break
+            total += len(data)
+            shards = self.split(data)
+            for f, x in zip(fouts, shards):
+                f.write(x)
+            for f, x in zip(fouts[self.k:], self.encode_shards(shards)):
+                f.write(x)
+            if len(data) < self.k * size:
+                break
+        return total
+
+    def decode_stream(self, fins, fout, total, size = chunk_size):
+        """
+        Rebuild total bytes of data from shard files (None for a missing one)
+        written by encode_stream with the same chunk size
+        """
+        while total > 0:
+            s = min(size, self.shard_size(total))
+            shards = [f.read(s) if f is not None else None for f in fins]
+            data = self.reconstruct(shards).tobytes()[:min(total, self.k * size)]
+            fout.write(data)
+            total -= len(data)
+
+
+def main():
+    k, m = 10, 4
+    rs = ReedSolomon(k, m)
+    data = os.urandom(50 << 20)
+
+    start = time.perf_counter()
+    shards = rs.encode(data)
+    elapsed = time.perf_counter() - start
+    print('Encoded %d MB into %d + %d shards: %.0f MB/s' % (len(data) >> 20, k, m, (len(data) >> 20) / elapsed))
+
+    # lose m shards, some of them data shards
+    lost = [0, 3, 7, 12]
+    for i in lost:
+        shards[i] = None
+    start = time.perf_counter()
+    res = rs.decode(shards, len(data))
+    elapsed = time.perf_counter() - start
+    print('Rebuilt without shards %s: %.0f MB/s, correct: %s' % (lost, (len(data) >> 20) / elapsed, res == data))
+
+    # streaming through files
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'data.bin')
+        with open(src, 'wb') as f:
+            f.write(data[:(5 << 20) + 123])
+        paths = [os.path.join(tmp, f'shard{i}') for i in range(k + m)]
+        fouts = [open(p, 'wb') for p in paths]
+        with open(src, 'rb') as fin:
+            total = rs.encode_stream(fin, fouts)
+        for f in fouts:
+            f.close()
+        fins = [open(p, 'rb') if i not in lost else None for i, p in enumerate(paths)]
+        dst = os.path.join(tmp, 'rebuilt.bin')
+        with open(dst, 'wb') as fout:
+            rs.decode_stream(fins, fout, total)
+        for f in fins:
+            if f is not None:
+                f.close()
+        with open(dst, 'rb') as f:
+            print('Streamed file rebuilt:', f.read() == data[:total])
+
+
+if __name__ == '__main__':
+    main()
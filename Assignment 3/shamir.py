@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# This file contains byte-wise Shamir secret sharing over GF(2^8) (AES polynomial).
+#
+# Every byte of the secret is the constant term of its own random polynomial of
+# degree t - 1, and share x holds the values of all the polynomials at x. All the
+# polynomials are evaluated at once with Horner's rule, where multiplying a whole
+# array by x is a gather from mul_table[x]. Any t shares give the secret back by
+# Lagrange interpolation at 0; the coefficients depend only on the share IDs.
+
+import os
+import time
+import numpy as np
+from functools import lru_cache
+from gf256 import GF256
+from gf256_matrix import mul_table
+
+# constants
+block_size = 1 << 16 # bytes of the secret processed at a time
+
+
+def split(secret, n, t):
+    """
+    Split a secret into n shares, any t of which recover it
+    Returns a list of (x, share) pairs with x = 1..n.
+    """
+    if not 1 <= t <= n <= 255:
+        raise ValueError(f"Invalid threshold: {t} of {n}")
+    secret = np.frombuffer(secret, dtype=np.uint8)
+    # coeffs[i] holds the coefficients of x^(i + 1) of every polynomial
+    coeffs = np.frombuffer(os.urandom((t - 1) * len(secret)), dtype=np.uint8).reshape(t - 1, len(secret))
+    shares = np.empty((n, len(secret)), dtype=np.uint8)
+    buf = np.empty(block_size, dtype=np.uint8)
+    for off in range(0, len(secret), block_size):
+        c = coeffs[:, off:off + block_size]
+        s = secret[off:off + block_size]
+        for x in range(1, n + 1):
+            row = mul_table[x]
+            y = shares[x - 1, off:off + block_size]
+            if t == 1:
+                y[:] = s
+                continue
+            y[:] = c[t - 2]
+            for i in range(t - 3, -1, -1):
+                np.take(row, y, out=buf[:len(y)])
+                np.bitwise_xor(buf[:len(y)], c[i], out=y)
+            np.take(row, y, out=buf[:len(y)])
+            np.bitwise_xor(buf[:len(y)], s, out=y)
+    return [(x, shares[x - 1].tobytes()) for x in range(1, n + 1)]
+
+
+@lru_cache(maxsize=64)
+def lagrange_coeffs(xs):
+    """
+    Lagrange coefficients for interpolating at 0 from the share IDs xs
+    (l_i = product of x_j / (x_j - x_i) over j != i)
+    """
+    res = []
+    for i, xi in enumerate(xs):
+        num, den = GF256(1), GF256(1)
+        for j, xj in enumerate(xs):
+            if j != i:
+                num *= GF256(xj)
+                den *= GF256(xj) - GF256(xi)
+        res.append((num * den.inverse()).num)
+    return tuple(res)
+
+
+def combine(shares):
+    """
+    Recover the secret from (x, share) pairs
+    (all of them are used, at least t are needed for the right secret)
+    """
+    xs = tuple(x for x, _ in shares)
+    if len(set(xs)) != len(xs) or not all(1 <= x <= 255 for x in xs):
+        raise ValueError("Share IDs must be distinct and in 1..255")
+    if len(set(len(y) for _, y in shares)) > 1:
+        raise ValueError("Shares must have the same length")
+    ys = [np.frombuffer(y, dtype=np.uint8) for _, y in shares]
+    res = np.zeros(len(ys[0]) if ys else 0, dtype=np.uint8)
+    buf = np.empty(block_size, dtype=np.uint8)
+    for off in range(0, len(res), block_size):
+        out = res[off:off + block_size]
+        tmp = buf[:len(out)]
+        for l, y in zip(lagrange_coeffs(xs), ys):
+            np.take(mul_table[l], y[off:off + block_size], out=tmp)
+            out ^= tmp
+    return res.tobytes()
+
+
+def main():
+    shares = split(b'attack at dawn', 5, 3)
+    for x, y in shares:
+        print(f'Share {x}: {y.hex()}')
+    print('Shares 1, 3, 5:', combine([shares[0], shares[2], shares[4]]))
+    print('Shares 2, 4:', combine([shares[1], shares[3]]))
+
+    secret = os.urandom(4 << 20)
+    start = time.perf_counter()
+    shares = split(secret, 32, 5)
+    elapsed = time.perf_counter() - start
+    print('4 MB split into 32 shares (threshold 5) in %.2fs' % elapsed)
+    start = time.perf_counter()
+    res = combine(shares[10:15])
+    elapsed = time.perf_counter() - start
+    print('Combined in %.2fs, correct: %s' % (elapsed, res == secret))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from functools import lru_cache
+from struct import Struct
 from gf256 import GF256
 
 # constants
@@ -186,10 +188,16 @@ def key_expansion(key):
     return w
 
 
-def encrypt_block(plaintext, key):
+def encrypt_block(plaintext, key, engine='reference'):
     """
     AES encrypt 16-byte block
+    (engine is one of 'reference', 'ttable')
     """
+    if engine == 'ttable':
+        return encrypt_block_ttable(plaintext, key)
+    elif engine != 'reference':
+        raise ValueError(f'Invalid engine: {engine}')
+
     # form state matrix
     s = [plaintext[i:i + 4] for i in range(0, 16, 4)]
     # get keys for 10+1 rounds
@@ -218,10 +226,16 @@ def encrypt_block(plaintext, key):
     return ciphertext
 
 
-def decrypt_block(ciphertext, key):
+def decrypt_block(ciphertext, key, engine='reference'):
     """
     AES decrypt 16-byte block
+    (engine is one of 'reference', 'ttable')
     """
+    if engine == 'ttable':
+        return decrypt_block_ttable(ciphertext, key)
+    elif engine != 'reference':
+        raise ValueError(f'Invalid engine: {engine}')
+
     # form state matrix
     s = [ciphertext[i:i + 4] for i in range(0, 16, 4)]
     # get keys for 10+1 rounds
@@ -252,6 +266,244 @@ def decrypt_block(ciphertext, key):
     return plaintext
 
 
+# t-table engine
+#
+# The state is held as 4 32-bit column words (row 0 in the most significant byte).
+# A round of encryption then becomes 16 table lookups and 16 XORs, since
+# enc_tables[j][x] is the column obtained by passing byte x (from row j) through
+# SubBytes and MixColumns. ShiftRows is folded in by picking the byte for row j
+# from column (c + j) % 4.
+#
+# Decryption uses the equivalent inverse cipher (FIPS-197 5.3.5): InvMixColumns
+# is linear, so it can be swapped with AddRoundKey if the round keys are passed
+# through InvMixColumns first. A round then has the same shape as an encryption
+# round (InvSubBytes + InvShiftRows + InvMixColumns fused into dec_tables).
+
+def pack_column(col):
+    """
+    Pack a column of 4 bytes into a 32-bit word
+    """
+    return (col[0] << 24) | (col[1] << 16) | (col[2] << 8) | col[3]
+
+
+def unpack_column(w):
+    """
+    Unpack a 32-bit word into a column of 4 bytes
+    """
+    return [(w >> 24) & 0xFF, (w >> 16) & 0xFF, (w >> 8) & 0xFF, w & 0xFF]
+
+
+def precomp_round_tables(transform, sbox):
+    """
+    Precompute 4 round tables for a mix column transform
+    (table j maps a byte in row j to its contribution to the output column)
+    """
+    # multiplying by a constant in GF(2^8) is the same for every byte, so
+    # build the 256 products of each distinct constant only once
+    products = {c: [(GF256(c) * GF256(x)).num for x in range(256)]
+                for row in transform for c in row}
+    return tuple(
+        tuple(pack_column([products[transform[i][j]][sbox[x]] for i in range(4)]) for x in range(256))
+        for j in range(4)
+    )
+
+
+# round tables for encryption (SubBytes + MixColumns)
+enc_tables = precomp_round_tables(mix_col_transform, s_box)
+# round tables for decryption (InvSubBytes + InvMixColumns)
+dec_tables = precomp_round_tables(inv_mix_col_transform, inv_s_box)
+# tables for InvMixColumns alone (used on the decryption round keys)
+inv_mix_tables = precomp_round_tables(inv_mix_col_transform, tuple(range(256)))
+
+# no. of expanded key schedules to keep around
+key_cache_size = 64
+
+# a 16-byte block in a flat buffer as 4 big-endian column words
+block_struct = Struct('>4I')
+
+
+def round_key_words(key):
+    """
+    Expand the key into the 44 32-bit words used by the t-table engine
+    """
+    if len(key) != 16:
+        raise ValueError(f"Invalid key length: {len(key)}")
+    key = [key[i:i + 4] for i in range(0, 16, 4)] # divide into 4-word blocks
+    return tuple(pack_column(word) for subkey in key_expansion(key) for word in subkey)
+
+
+def inv_round_key_words(rk):
+    """
+    Decryption key words for the equivalent inverse cipher
+    (round keys in reverse order, rounds 9 to 1 passed through InvMixColumns)
+    """
+    t0, t1, t2, t3 = inv_mix_tables
+    dk = list(rk[40:44])
+    for i in range(36, 0, -4):
+        dk.extend(t0[w >> 24] ^ t1[(w >> 16) & 0xFF] ^ t2[(w >> 8) & 0xFF] ^ t3[w & 0xFF] for w in rk[i:i + 4])
+    dk.extend(rk[0:4])
+    return tuple(dk)
+
+
+@lru_cache(maxsize=key_cache_size)
+def key_schedule(key):
+    """
+    Expanded key words for a key given as bytes
+    (the most recently used schedules are cached)
+    """
+    return round_key_words(key)
+
+
+@lru_cache(maxsize=key_cache_size)
+def inv_key_schedule(key):
+    """
+    Decryption key words (equivalent inverse cipher) for a key given as bytes
+    """
+    return inv_round_key_words(key_schedule(key))
+
+
+def encrypt_words(s0, s1, s2, s3, rk):
+    """
+    AES encrypt a state of 4 column words with the expanded key words rk
+    """
+    t0, t1, t2, t3 = enc_tables
+    sb = s_box
+
+    s0 ^= rk[0]
+    s1 ^= rk[1]
+    s2 ^= rk[2]
+    s3 ^= rk[3]
+
+    for i in range(4, 40, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[(s1 >> 16) & 0xFF] ^ t2[(s2 >> 8) & 0xFF] ^ t3[s3 & 0xFF] ^ rk[i],
+            t0[s1 >> 24] ^ t1[(s2 >> 16) & 0xFF] ^ t2[(s3 >> 8) & 0xFF] ^ t3[s0 & 0xFF] ^ rk[i + 1],
+            t0[s2 >> 24] ^ t1[(s3 >> 16) & 0xFF] ^ t2[(s0 >> 8) & 0xFF] ^ t3[s1 & 0xFF] ^ rk[i + 2],
+            t0[s3 >> 24] ^ t1[(s0 >> 16) & 0xFF] ^ t2[(s1 >> 8) & 0xFF] ^ t3[s2 & 0xFF] ^ rk[i + 3],
+        )
+
+    # last round (no MixColumns)
+    return (
+        ((sb[s0 >> 24] << 24) | (sb[(s1 >> 16) & 0xFF] << 16) | (sb[(s2 >> 8) & 0xFF] << 8) | sb[s3 & 0xFF]) ^ rk[40],
+        ((sb[s1 >> 24] << 24) | (sb[(s2 >> 16) & 0xFF] << 16) | (sb[(s3 >> 8) & 0xFF] << 8) | sb[s0 & 0xFF]) ^ rk[41],
+        ((sb[s2 >> 24] << 24) | (sb[(s3 >> 16) & 0xFF] << 16) | (sb[(s0 >> 8) & 0xFF] << 8) | sb[s1 & 0xFF]) ^ rk[42],
+        ((sb[s3 >> 24] << 24) | (sb[(s0 >> 16) & 0xFF] << 16) | (sb[(s1 >> 8) & 0xFF] << 8) | sb[s2 & 0xFF]) ^ rk[43],
+    )
+
+
+def decrypt_words(s0, s1, s2, s3, dk):
+    """
+    AES decrypt a state of 4 column words with the decryption key words dk
+    (see inv_round_key_words)
+    """
+    t0, t1, t2, t3 = dec_tables
+    isb = inv_s_box
+
+    s0 ^= dk[0]
+    s1 ^= dk[1]
+    s2 ^= dk[2]
+    s3 ^= dk[3]
+
+    for i in range(4, 40, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[(s3 >> 16) & 0xFF] ^ t2[(s2 >> 8) & 0xFF] ^ t3[s1 & 0xFF] ^ dk[i],
+            t0[s1 >> 24] ^ t1[(s0 >> 16) & 0xFF] ^ t2[(s3 >> 8) & 0xFF] ^ t3[s2 & 0xFF] ^ dk[i + 1],
+            t0[s2 >> 24] ^ t1[(s1 >> 16) & 0xFF] ^ t2[(s0 >> 8) & 0xFF] ^ t3[s3 & 0xFF] ^ dk[i + 2],
+            t0[s3 >> 24] ^ t1[(s2 >> 16) & 0xFF] ^ t2[(s1 >> 8) & 0xFF] ^ t3[s0 & 0xFF] ^ dk[i + 3],
+        )
+
+    # last round (no InvMixColumns)
+    return (
+        ((isb[s0 >> 24] << 24) | (isb[(s3 >> 16) & 0xFF] << 16) | (isb[(s2 >> 8) & 0xFF] << 8) | isb[s1 & 0xFF]) ^ dk[40],
+        ((isb[s1 >> 24] << 24) | (isb[(s0 >> 16) & 0xFF] << 16) | (isb[(s3 >> 8) & 0xFF] << 8) | isb[s2 & 0xFF]) ^ dk[41],
+        ((isb[s2 >> 24] << 24) | (isb[(s1 >> 16) & 0xFF] << 16) | (isb[(s0 >> 8) & 0xFF] << 8) | isb[s3 & 0xFF]) ^ dk[42],
+        ((isb[s3 >> 24] << 24) | (isb[(s2 >> 16) & 0xFF] << 16) | (isb[(s1 >> 8) & 0xFF] << 8) | isb[s0 & 0xFF]) ^ dk[43],
+    )
+
+
+def encrypt_block_ttable(plaintext, key):
+    """
+    AES encrypt 16-byte block (t-table engine)
+    (ciphertext is laid out row by row, same as encrypt_block)
+    """
+    s = [pack_column(plaintext[i:i + 4]) for i in range(0, 16, 4)]
+    s = [unpack_column(w) for w in encrypt_words(*s, key_schedule(bytes(key)))]
+    return [s[j][i] for i in range(4) for j in range(4)]
+
+
+def decrypt_block_ttable(ciphertext, key):
+    """
+    AES decrypt 16-byte block (t-table engine)
+    (ciphertext is laid out row by row, same as decrypt_block)
+    """
+    s = [pack_column(ciphertext[i::4]) for i in range(4)]
+    s = decrypt_words(*s, inv_key_schedule(bytes(key)))
+    return [x for w in s for x in unpack_column(w)]
+
+
+class AES:
+    """
+    AES-128 cipher bound to a key
+    (the key is expanded once for encryption and decryption,
+    blocks are then processed with the t-table engine)
+    """
+
+    def __init__(self, key):
+        self.key = bytes(key) # convert first, a wide integer array is not 16 bytes
+        if len(self.key) != 16:
+            raise ValueError(f"Invalid key length: {len(self.key)}")
+        self.rk = key_schedule(self.key)
+        self.dk = inv_key_schedule(self.key)
+
+    def encrypt_words(self, s0, s1, s2, s3):
+        """
+        Encrypt a state of 4 column words
+        """
+        return encrypt_words(s0, s1, s2, s3, self.rk)
+
+    def decrypt_words(self, s0, s1, s2, s3):
+        """
+        Decrypt a state of 4 column words
+        """
+        return decrypt_words(s0, s1, s2, s3, self.dk)
+
+    def encrypt_into(self, src, dst, offset = 0, count = 1):
+        """
+        AES encrypt count blocks of a flat buffer starting at offset,
+        writing them to the same offset of dst (src and dst may be the same buffer)
+        """
+        rk = self.rk
+        unpack, pack = block_struct.unpack_from, block_struct.pack_into
+        for off in range(offset, offset + 16 * count, 16):
+            pack(dst, off, *encrypt_words(*unpack(src, off), rk))
+
+    def decrypt_into(self, src, dst, offset = 0, count = 1):
+        """
+        AES decrypt count blocks of a flat buffer starting at offset,
+        writing them to the same offset of dst (src and dst may be the same buffer)
+        """
+        dk = self.dk
+        unpack, pack = block_struct.unpack_from, block_struct.pack_into
+        for off in range(offset, offset + 16 * count, 16):
+            pack(dst, off, *decrypt_words(*unpack(src, off), dk))
+
+    def encrypt_block(self, plaintext):
+        """
+        AES encrypt 16-byte block (same layout as encrypt_block)
+        """
+        s = [pack_column(plaintext[i:i + 4]) for i in range(0, 16, 4)]
+        s = [unpack_column(w) for w in encrypt_words(*s, self.rk)]
+        return [s[j][i] for i in range(4) for j in range(4)]
+
+    def decrypt_block(self, ciphertext):
+        """
+        AES decrypt 16-byte block (same layout as decrypt_block)
+        """
+        s = [pack_column(ciphertext[i::4]) for i in range(4)]
+        s = decrypt_words(*s, self.dk)
+        return [x for w in s for x in unpack_column(w)]
+
+
 def demonstrate_avalanche(plaintext1, key1, plaintext2, key2):
     def mat2text(a):
         """
@@ -326,6 +578,22 @@ def main():
     print('Ciphertext:', ciphertext)
     print('Decrypted Plaintext:', deciphertext)
 
+    # same example with the t-table engine
+    ciphertext = encrypt_block(plaintext, key, engine='ttable')
+    deciphertext = decrypt_block(ciphertext, key, engine='ttable')
+    ciphertext = ''.join(['%02x' % i for i in ciphertext])
+    deciphertext = ''.join(['%02x' % i for i in deciphertext])
+    print('Ciphertext (T-table):', ciphertext)
+    print('Decrypted Plaintext (T-table):', deciphertext)
+
+    # same example in place on a flat buffer (standard byte order)
+    cipher = AES(key)
+    buf = bytearray(plaintext)
+    cipher.encrypt_into(buf, buf)
+    print('Ciphertext (in place):', buf.hex())
+    cipher.decrypt_into(buf, buf)
+    print('Decrypted Plaintext (in place):', buf.hex())
+
     # demonstration of avalanche
     print('\nAvalanche Effect Demonstration:')
     # 1 bit difference in plaintext and same key
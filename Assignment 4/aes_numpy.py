@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# This file contains a NumPy engine that runs N AES blocks through the rounds together.
+# Blocks are rows of an (N, 16) uint8 array in the standard (FIPS-197) byte order,
+# so byte 4c + r of a row is row r, column c of its state.
+
+import time
+import numpy as np
+from aes import AES, s_box, inv_s_box, r_con
+
+# constants
+np_s_box = np.array(s_box, dtype=np.uint8)
+np_inv_s_box = np.array(inv_s_box, dtype=np.uint8)
+
+# byte permutations for (inverse) ShiftRows on a flat block
+shift_rows_perm = np.array([4 * ((c + r) % 4) + r for c in range(4) for r in range(4)])
+inv_shift_rows_perm = np.array([4 * ((c - r) % 4) + r for c in range(4) for r in range(4)])
+
+
+def key_expansion_many(keys):
+    """
+    Expand a (K, 16) array of keys into a (K, 11, 16) array of round keys
+    (same steps as key_expansion, each one applied to all K keys at once)
+    """
+    keys = np.asarray(keys, dtype=np.uint8).reshape(-1, 16)
+    w = np.empty((keys.shape[0], 44, 4), dtype=np.uint8)
+    w[:, :4] = keys.reshape(-1, 4, 4) # copy first 4 words as is
+
+    for i in range(4, 44):
+        tmp = w[:, i - 1]
+        if i % 4 == 0:
+            # 1 byte circular left shift, sbox substitution, xor first byte with rcon
+            tmp = np_s_box[tmp[:, [1, 2, 3, 0]]]
+            tmp[:, 0] ^= r_con[i // 4]
+        w[:, i] = w[:, i - 4] ^ tmp
+
+    # divide 44 words into 11 keys of 4 words each
+    return w.reshape(-1, 11, 16)
+
+
+def round_key_array(key):
+    """
+    Expand the key into an (11, 16) array of round keys
+    (an array of round keys, e.g. from key_expansion_many, is returned as is)
+    """
+    if isinstance(key, np.ndarray) and key.ndim >= 2:
+        return key
+    cipher = key if isinstance(key, AES) else AES(key)
+    return np.array(cipher.rk, dtype='>u4').view(np.uint8).reshape(11, 16)
+
+
+def to_blocks(data):
+    """
+    View a bytes-like object (length a multiple of 16) as an (N, 16) array
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if data.size % 16 != 0:
+        raise ValueError("Data length must be a multiple of 16")
+    return data.reshape(-1, 16)
+
+
+def xtime(a):
+    """
+    Multiply every byte by x in GF(2^8)
+    """
+    return (a << 1) ^ ((a >> 7) * np.uint8(0x1B))
+
+
+def mix_columns(s):
+    """
+    MixColumns on an (N, 16) state array
+    """
+    s = s.reshape(-1, 4, 4) # (block, column, row)
+    a0, a1, a2, a3 = s[:, :, 0], s[:, :, 1], s[:, :, 2], s[:, :, 3]
+    t = a0 ^ a1 ^ a2 ^ a3
+    res = np.empty_like(s)
+    res[:, :, 0] = a0 ^ t ^ xtime(a0 ^ a1)
+    res[:, :, 1] = a1 ^ t ^ xtime(a1 ^ a2)
+    res[:, :, 2] = a2 ^ t ^ xtime(a2 ^ a3)
+    res[:, :, 3] = a3 ^ t ^ xtime(a3 ^ a0)
+    return res.reshape(-1, 16)
+
+
+def inv_mix_columns(s):
+    """
+    InvMixColumns on an (N, 16) state array
+    (InvMixColumns = MixColumns after multiplying rows 0, 2 and 1, 3 by x^2 + 1)
+    """
+    s = s.reshape(-1, 4, 4).copy()
+    u = xtime(xtime(s[:, :, 0] ^ s[:, :, 2]))
+    v = xtime(xtime(s[:, :, 1] ^ s[:, :, 3]))
+    s[:, :, 0] ^= u
+    s[:, :, 1] ^= v
+    s[:, :, 2] ^= u
+    s[:, :, 3] ^= v
+    return mix_columns(s)
+
+
+def encrypt_blocks(blocks, key):
+    """
+    AES encrypt an (N, 16) array of blocks
+    (key may also be an (N, 11, 16) array of round keys, one per block)
+    """
+    k = round_key_array(key)
+    s = np.asarray(blocks, dtype=np.uint8).reshape(-1, 16) ^ k[..., 0, :]
+    for i in range(1, 10):
+        s = mix_columns(np_s_box[s][:, shift_rows_perm]) ^ k[..., i, :]
+    return np_s_box[s][:, shift_rows_perm] ^ k[..., 10, :]
+
+
+def decrypt_blocks(blocks, key):
+    """
+    AES decrypt an (N, 16) array of blocks
+    (key may also be an (N, 11, 16) array of round keys, one per block)
+    """
+    k = round_key_array(key)
+    s = np_inv_s_box[(np.asarray(blocks, dtype=np.uint8).reshape(-1, 16) ^ k[..., 10, :])[:, inv_shift_rows_perm]]
+    for i in range(9, 0, -1):
+        s = np_inv_s_box[inv_mix_columns(s ^ k[..., i, :])[:, inv_shift_rows_perm]]
+    return s ^ k[..., 0, :]
+
+
+def counter_blocks(nonce, start, n):
+    """
+    Counter blocks nonce + start, ..., nonce + start + n - 1 (mod 2^128) as an (n, 16) array
+    """
+    ctr = int.from_bytes(nonce, 'big') + start
+    hi = np.full(n, (ctr >> 64) & (2**64 - 1), dtype=np.uint64)
+    lo = np.uint64(ctr & (2**64 - 1)) + np.arange(n, dtype=np.uint64) # wraps around mod 2^64
+    hi += (lo < np.uint64(ctr & (2**64 - 1))).astype(np.uint64) # carry into the high half
+    res = np.empty((n, 2), dtype='>u8')
+    res[:, 0] = hi
+    res[:, 1] = lo
+    return res.view(np.uint8).reshape(n, 16)
+
+
+def ecb_encrypt(data, key):
+    """
+    ECB encrypt data (length a multiple of 16, no padding)
+    """
+    return encrypt_blocks(to_blocks(data), key).tobytes()
+
+
+def ecb_decrypt(data, key):
+    """
+    ECB decrypt data (length a multiple of 16, no padding)
+    """
+    return decrypt_blocks(to_blocks(data), key).tobytes()
+
+
+def ctr_xor(data, key, nonce, start = 0):
+    """
+    CTR encrypt (or decrypt) data, starting from block no. start
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    n = (data.size + 15) // 16
+    keystream = encrypt_blocks(counter_blocks(nonce, start, n), key).reshape(-1)
+    return (data ^ keystream[:data.size]).tobytes()
+
+
+def main():
+    key = bytes.fromhex('000102030405060708090a0b0c0d0e0f')
+    plaintext = bytes.fromhex('00112233445566778899aabbccddeeff')
+    ciphertext = ecb_encrypt(plaintext, key)
+    print('Ciphertext (FIPS-197 C.1):', ciphertext.hex())
+    print('Decrypted Plaintext:', ecb_decrypt(ciphertext, key).hex())
+
+    # throughput of the batched engine against the per-block t-table path
+    n = 1 << 16
+    blocks = np.random.randint(0, 256, size=(n, 16), dtype=np.uint8)
+    cipher = AES(key)
+
+    start = time.perf_counter()
+    res = encrypt_blocks(blocks, cipher)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [cipher.encrypt_words(*w) for w in blocks[:4096].view('>u4').tolist()]
+    single = (time.perf_counter() - start) * n / 4096
+
+    print(f'{n} blocks batched: {batched:.2f}s ({n * 16 / batched / 1e6:.2f} MB/s)')
+    print(f'{n} blocks one at a time (estimated): {single:.2f}s ({n * 16 / single / 1e6:.2f} MB/s)')
+    print('Matches t-table engine:', np.array_equal(res[:4096], to_blocks(np.array(expected, dtype='>u4').view(np.uint8))))
+
+    # key setup for many keys at once against one key at a time
+    keys = np.random.randint(0, 256, size=(n, 16), dtype=np.uint8)
+
+    start = time.perf_counter()
+    k = key_expansion_many(keys)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = np.stack([round_key_array(x.tobytes()) for x in keys[:256]])
+    single = (time.perf_counter() - start) * n / 256
+
+    print(f'{n} keys expanded batched: {batched:.2f}s')
+    print(f'{n} keys expanded one at a time (estimated): {single:.2f}s')
+    print('Matches key_expansion:', np.array_equal(k[:256], expected))
+    res = encrypt_blocks(blocks, k) # one key per block
+    print('Decrypts with per-block keys:', np.array_equal(decrypt_blocks(res, k), blocks))
+
+
+if __name__ == '__main__':
+    main()
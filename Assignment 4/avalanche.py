@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+# This file contains a statistical analyzer for the avalanche effect of AES.
+# For every input bit (of the plaintext or the key) it encrypts random pairs
+# that differ only in that bit, and collects
+#   - a histogram of the Hamming distance between the pair after every round
+#   - the strict avalanche criterion (SAC) matrix, i.e. the probability that
+#     output bit j flips when input bit i is flipped
+# Bits are numbered from the most significant bit of byte 0 (standard byte order).
+
+import sys
+import json
+import getopt
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from aes_numpy import np_s_box, shift_rows_perm, mix_columns, key_expansion_many
+
+# constants
+rounds = 11 # states after rounds 0 (initial AddRoundKey) to 10
+bits = 128
+
+
+def round_states(blocks, k):
+    """
+    States of an (N, 16) array of blocks after every round
+    (k is an (11, 16) array of round keys, or an (N, 11, 16) array with a key per block)
+    """
+    s = blocks ^ k[..., 0, :]
+    states = [s]
+    for i in range(1, 10):
+        s = mix_columns(np_s_box[s][:, shift_rows_perm]) ^ k[..., i, :]
+        states.append(s)
+    s = np_s_box[s][:, shift_rows_perm] ^ k[..., 10, :]
+    states.append(s)
+    return states
+
+
+def flip_bit(a, i):
+    """
+    Copy of an (N, 16) array with bit i of every row flipped
+    """
+    a = a.copy()
+    a[:, i // 8] ^= np.uint8(0x80 >> (i % 8))
+    return a
+
+
+def analyze_bits(target, input_bits, samples, seed):
+    """
+    Collect Hamming distance histograms and SAC rows for some input bits
+    (runs in a worker process)
+    """
+    rng = np.random.default_rng(seed)
+    hist = np.zeros((rounds, bits + 1), dtype=np.int64)
+    sac = np.zeros((len(input_bits), bits), dtype=np.int64)
+
+    for row, i in enumerate(input_bits):
+        plaintext = rng.integers(0, 256, size=(samples, 16), dtype=np.uint8)
+        key = rng.integers(0, 256, size=(samples, 16), dtype=np.uint8)
+        k1 = key_expansion_many(key)
+        s1 = round_states(plaintext, k1)
+        if target == 'plaintext':
+            s2 = round_states(flip_bit(plaintext, i), k1)
+        else:
+            s2 = round_states(plaintext, key_expansion_many(flip_bit(key, i)))
+
+        for r in range(rounds):
+            diff = np.unpackbits(s1[r] ^ s2[r], axis=1)
+            hist[r] += np.bincount(diff.sum(axis=1), minlength=bits + 1)
+        sac[row] = diff.sum(axis=0) # flips of every output bit after the last round
+
+    return hist, sac
+
+
+def analyze(samples = 1000, target = 'plaintext', workers = None, seed = None):
+    """
+    Run the analysis with the given no. of samples per input bit
+    spread over a pool of worker processes
+    """
+    if target not in ('plaintext', 'key'):
+        raise ValueError(f'Invalid target: {target}')
+    # one task per group of 8 input bits
+    tasks = [list(range(i, i + 8)) for i in range(0, bits, 8)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    hist = np.zeros((rounds, bits + 1), dtype=np.int64)
+    sac = np.zeros((bits, bits), dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyze_bits, target, t, samples, s) for t, s in zip(tasks, seeds)]
+        for t, future in zip(tasks, futures):
+            h, s = future.result()
+            hist += h
+            sac[t[0]:t[-1] + 1] = s
+
+    return {
+        'target': target,
+        'samples': samples,
+        'hist': hist,
+        'sac': sac / samples,
+    }
+
+
+def save_csv(result, prefix):
+    """
+    Write the histograms and the SAC matrix to <prefix>_hist.csv and <prefix>_sac.csv
+    """
+    with open(f'{prefix}_hist.csv', 'w') as f:
+        f.write('round,' + ','.join(f'hd{d}' for d in range(bits + 1)) + '\n')
+        for r, row in enumerate(result['hist']):
+            f.write(f'{r},' + ','.join(str(x) for x in row) + '\n')
+    with open(f'{prefix}_sac.csv', 'w') as f:
+        f.write('input_bit,' + ','.join(f'out{j}' for j in range(bits)) + '\n')
+        for i, row in enumerate(result['sac']):
+            f.write(f'{i},' + ','.join(f'{x:.6f}' for x in row) + '\n')
+
+
+def save_json(result, path):
+    """
+    Write the full result to a JSON file
+    """
+    with open(path, 'w') as f:
+        json.dump({
+            'target': result['target'],
+            'samples': result['samples'],
+            'hist': result['hist'].tolist(),
+            'sac': result['sac'].tolist(),
+        }, f)
+
+
+def main():
+    """
+    Main function
+    """
+    # command line arguments
+    short_options = 'n:t:w:s:o:h'
+    long_options = ['samples=', 'target=', 'workers=', 'seed=', 'output=', 'help']
+
+    # default values
+    samples = 1000
+    target = 'plaintext'
+    workers = None
+    seed = None
+    output = None
+
+    arguments, values = getopt.getopt(sys.argv[1:], short_options, long_options)
+
+    for current_argument, current_value in arguments:
+        if current_argument in ('-n', '--samples'):
+            samples = int(current_value)
+        elif current_argument in ('-t', '--target'):
+            target = current_value
+        elif current_argument in ('-w', '--workers'):
+            workers = int(current_value)
+        elif current_argument in ('-s', '--seed'):
+            seed = int(current_value)
+        elif current_argument in ('-o', '--output'):
+            output = current_value
+        elif current_argument in ('-h', '--help'):
+            print('Usage: python3 avalanche.py [options]')
+            print('Options:')
+            print('  -n, --samples=<samples per input bit>')
+            print('  -t, --target=<plaintext|key>')
+            print('  -w, --workers=<no. of processes>')
+            print('  -s, --seed=<seed>')
+            print('  -o, --output=<output prefix>')
+            print('  -h, --help')
+            sys.exit(0)
+        else:
+            raise ValueError(f'Invalid argument: {current_argument}')
+
+    result = analyze(samples, target, workers, seed)
+    hist, sac = result['hist'], result['sac']
+
+    print(f'Flipping 1 {target} bit, {samples} samples per bit:')
+    for r in range(rounds):
+        mean = (hist[r] * np.arange(bits + 1)).sum() / hist[r].sum()
+        print('Round %2d: mean Hamming distance %.2f' % (r, mean))
+    print('SAC: mean flip probability %.4f, max deviation from 0.5 %.4f' % (sac.mean(), np.abs(sac - 0.5).max()))
+
+    if output:
+        save_csv(result, output)
+        save_json(result, f'{output}.json')
+
+
+if __name__ == '__main__':
+    main()
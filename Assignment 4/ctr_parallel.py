@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# This file contains a multi-core AES-CTR engine.
+# CTR mode has no chaining, so the input is split into fixed-size segments
+# and each segment is encrypted by a worker process starting from its own
+# counter offset (initial counter + no. of blocks before the segment).
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from modes import CTRCipher, block_size
+
+# constants
+segment_size = 1 << 20 # bytes per segment (must be a multiple of the block size)
+
+
+def ctr_segment(key, counter, data):
+    """
+    CTR encrypt one segment starting from the given counter value
+    """
+    return CTRCipher(key, counter.to_bytes(block_size, 'big')).update(data)
+
+
+def ctr_parallel(key, nonce, data, out = None, workers = None, size = segment_size):
+    """
+    CTR encrypt (or decrypt) data using a pool of worker processes
+    (results are written in order into out, which is allocated if not given)
+    """
+    if size <= 0 or size % block_size != 0:
+        raise ValueError(f"Segment size must be a positive multiple of {block_size}")
+    if len(nonce) != block_size:
+        raise ValueError(f"Invalid counter block length: {len(nonce)}")
+
+    key = bytes(key)
+    data = memoryview(data).cast('B')
+    n = len(data)
+    if out is None:
+        out = bytearray(n)
+    elif len(out) < n:
+        raise ValueError("Output buffer is too small")
+    counter = int.from_bytes(nonce, 'big')
+
+    def segment(off):
+        ctr = (counter + off // block_size) % (1 << 128)
+        return ctr, bytes(data[off:off + size])
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n <= size:
+        # not worth starting any processes
+        for off in range(0, n, size):
+            seg = ctr_segment(key, *segment(off))
+            out[off:off + len(seg)] = seg # exact length, so a longer out is never resized
+        return out
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded no. of segments in flight so memory stays constant
+        pending = deque()
+        for off in range(0, n, size):
+            pending.append((off, executor.submit(ctr_segment, key, *segment(off))))
+            if len(pending) >= 2 * workers:
+                off, future = pending.popleft()
+                seg = future.result()
+                out[off:off + len(seg)] = seg
+        while pending:
+            off, future = pending.popleft()
+            seg = future.result()
+            out[off:off + len(seg)] = seg
+    return out
+
+
+def main():
+    key = bytes.fromhex('0f1571c947d9e8590cb7add6af7f6798')
+    nonce = bytes(block_size)
+    data = os.urandom(1 << 20)
+    workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    expected = CTRCipher(key, nonce).update(data)
+    single = time.perf_counter() - start
+    print(f'Single process: {single:.2f}s ({len(data) / single / 1e6:.2f} MB/s)')
+
+    start = time.perf_counter()
+    res = ctr_parallel(key, nonce, data, workers=workers, size=64 << 10)
+    multi = time.perf_counter() - start
+    print(f'{workers} workers: {multi:.2f}s ({len(data) / multi / 1e6:.2f} MB/s)')
+    print('Speedup: %.2fx' % (single / multi))
+    print('Matches single process output:', res == expected)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+# This file contains AES-GCM (NIST SP 800-38D) built on the block function in aes.py.
+#
+# GHASH multiplies by the hash key H in GF(2^128) defined by x^128 + x^7 + x^2 + x + 1,
+# with the bits of a block reflected (the most significant bit of byte 0 is x^0).
+# Multiplying by a fixed H is linear, so for every key 16 tables of 256 entries
+# are precomputed (Shoup's method with 8-bit windows): table i maps byte i of a block
+# to its product with H, and a full product is 16 lookups and 15 XORs.
+
+import hmac
+from functools import lru_cache
+from aes import AES, key_cache_size
+from modes import CTRCipher, to_cipher, block_size
+
+# constants
+R = 0xE1 << 120 # reduction constant (x^128 = x^7 + x^2 + x + 1, reflected)
+tag_size = 16
+
+
+def gf128_mul(x, y):
+    """
+    Multiply two elements of GF(2^128) (as GCM blocks read as big-endian ints)
+    bit by bit (reference implementation)
+    """
+    z = 0
+    v = y
+    for i in range(127, -1, -1):
+        if (x >> i) & 1:
+            z ^= v
+        v = (v >> 1) ^ R if v & 1 else v >> 1 # multiply by x
+    return z
+
+
+@lru_cache(maxsize=key_cache_size)
+def precomp_ghash_tables(h):
+    """
+    Precompute the 16 x 256 multiplication tables for the hash key h
+    (the tables of the most recently used keys are cached, like the key schedules)
+    """
+    # powers[k] = h * x^k
+    powers = [h]
+    for _ in range(127):
+        v = powers[-1]
+        powers.append((v >> 1) ^ R if v & 1 else v >> 1)
+
+    tables = []
+    for i in range(16):
+        # bit j (from the most significant) of byte i is the coefficient of x^(8i + j)
+        basis = [powers[8 * i + 7 - j] for j in range(8)] # basis[j] is the product for bit value 1 << j
+        t = [0] * 256
+        for b in range(1, 256):
+            low = b & -b
+            t[b] = t[b ^ low] ^ basis[low.bit_length() - 1]
+        tables.append(tuple(t))
+    return tuple(tables)
+
+
+class GHASH:
+    """
+    Incremental GHASH with a precomputed table for the hash key
+    (tables already computed for the same key can be passed in)
+    """
+
+    def __init__(self, h, tables = None):
+        self.tables = tables or precomp_ghash_tables(h)
+        self.y = 0
+        self.buf = b'' # partial block
+
+    def mul_h(self, x):
+        """
+        Multiply x by the hash key using the tables
+        """
+        t = self.tables
+        return (
+            t[0][x >> 120] ^ t[1][(x >> 112) & 0xFF] ^ t[2][(x >> 104) & 0xFF] ^ t[3][(x >> 96) & 0xFF] ^
+            t[4][(x >> 88) & 0xFF] ^ t[5][(x >> 80) & 0xFF] ^ t[6][(x >> 72) & 0xFF] ^ t[7][(x >> 64) & 0xFF] ^
+            t[8][(x >> 56) & 0xFF] ^ t[9][(x >> 48) & 0xFF] ^ t[10][(x >> 40) & 0xFF] ^ t[11][(x >> 32) & 0xFF] ^
+            t[12][(x >> 24) & 0xFF] ^ t[13][(x >> 16) & 0xFF] ^ t[14][(x >> 8) & 0xFF] ^ t[15][x & 0xFF]
+        )
+
+    def update(self, data):
+        """
+        Absorb data (a trailing partial block is kept for the next call)
+        """
+        data = self.buf + bytes(data)
+        n = len(data) - len(data) % block_size
+        y = self.y
+        for off in range(0, n, block_size):
+            y = self.mul_h(y ^ int.from_bytes(data[off:off + block_size], 'big'))
+        self.y = y
+        self.buf = data[n:]
+
+    def pad(self):
+        """
+        Absorb the partial block padded with zeros
+        """
+        if self.buf:
+            self.y = self.mul_h(self.y ^ int.from_bytes(self.buf.ljust(block_size, b'\0'), 'big'))
+            self.buf = b''
+
+    def digest(self):
+        """
+        Current GHASH value as a 128-bit int
+        """
+        self.pad()
+        return self.y
+
+
+class GCMContext:
+    """
+    Base class for GCM encryption and decryption
+    Additional authenticated data (update_aad) must be given before the payload (update).
+    """
+
+    def __init__(self, key, iv):
+        if len(iv) == 0:
+            raise ValueError("IV must not be empty")
+        self.cipher = to_cipher(key)
+        h = bytearray(block_size)
+        self.cipher.encrypt_into(h, h)
+        self.ghash = GHASH(int.from_bytes(h, 'big'))
+
+        # pre-counter block
+        if len(iv) == 12:
+            j0 = bytes(iv) + b'\0\0\0\1'
+        else:
+            g = GHASH(None, self.ghash.tables)
+            g.update(iv)
+            g.pad()
+            g.update((len(iv) * 8).to_bytes(16, 'big'))
+            j0 = g.digest().to_bytes(16, 'big')
+        self.tag_mask = bytearray(j0)
+        self.cipher.encrypt_into(self.tag_mask, self.tag_mask)
+
+        # the payload is encrypted from inc32(j0) on
+        ctr = int.from_bytes(j0, 'big')
+        ctr = (ctr & ~0xFFFFFFFF) | ((ctr + 1) & 0xFFFFFFFF)
+        self.ctr = CTRCipher(self.cipher, ctr.to_bytes(16, 'big'), width=32)
+
+        self.aad_len = 0
+        self.msg_len = 0
+        self.aad_done = False
+        self.finalized = False
+
+    def update_aad(self, data):
+        """
+        Absorb a chunk of additional authenticated data
+        """
+        if self.aad_done or self.finalized:
+            raise ValueError("AAD must be given before the payload")
+        self.aad_len += len(data)
+        self.ghash.update(data)
+
+    def start_payload(self):
+        """
+        Close the additional authenticated data before the first payload chunk
+        """
+        if self.finalized:
+            raise ValueError("Context already finalized")
+        if not self.aad_done:
+            self.ghash.pad()
+            self.aad_done = True
+
+    def compute_tag(self):
+        """
+        Final authentication tag
+        """
+        self.start_payload()
+        self.finalized = True
+        self.ghash.pad()
+        self.ghash.update((self.aad_len * 8).to_bytes(8, 'big') + (self.msg_len * 8).to_bytes(8, 'big'))
+        s = self.ghash.digest().to_bytes(16, 'big')
+        return bytes(x ^ y for x, y in zip(s, self.tag_mask))
+
+
+class GCMEncryptor(GCMContext):
+    """
+    AES-GCM encryption (the tag is available after finalize)
+    """
+
+    def __init__(self, key, iv):
+        super().__init__(key, iv)
+        self.tag = None
+
+    def update(self, data):
+        """
+        Encrypt a chunk of the payload
+        """
+        self.start_payload()
+        res = self.ctr.update(data)
+        self.msg_len += len(res)
+        self.ghash.update(res)
+        return res
+
+    def finalize(self):
+        """
+        Finish encryption and compute the tag
+        """
+        self.tag = self.compute_tag()
+        return b''
+
+
+class GCMDecryptor(GCMContext):
+    """
+    AES-GCM decryption
+    (plaintext returned by update must not be used before finalize has checked the tag)
+    """
+
+    def __init__(self, key, iv, tag):
+        super().__init__(key, iv)
+        if len(tag) < 4 or len(tag) > tag_size:
+            raise ValueError(f"Invalid tag length: {len(tag)}")
+        self.tag = bytes(tag)
+
+    def update(self, data):
+        """
+        Decrypt a chunk of the payload
+        """
+        self.start_payload()
+        self.msg_len += len(data)
+        self.ghash.update(data)
+        return self.ctr.update(data)
+
+    def finalize(self):
+        """
+        Finish decryption and verify the tag
+        """
+        tag = self.compute_tag()[:len(self.tag)]
+        if not hmac.compare_digest(tag, self.tag):
+            raise ValueError("Authentication tag mismatch")
+        return b''
+
+
+def encrypt(key, iv, plaintext, aad = b''):
+    """
+    AES-GCM encrypt a message, returning the ciphertext and the tag
+    """
+    ctx = GCMEncryptor(key, iv)
+    ctx.update_aad(aad)
+    ciphertext = ctx.update(plaintext) + ctx.finalize()
+    return ciphertext, ctx.tag
+
+
+def decrypt(key, iv, ciphertext, tag, aad = b''):
+    """
+    AES-GCM decrypt a message (raises ValueError if it is not authentic)
+    """
+    ctx = GCMDecryptor(key, iv, tag)
+    ctx.update_aad(aad)
+    plaintext = ctx.update(ciphertext)
+    ctx.finalize()
+    return plaintext
+
+
+def main():
+    # test case 4 from the GCM specification
+    key = bytes.fromhex('feffe9928665731c6d6a8f9467308308')
+    iv = bytes.fromhex('cafebabefacedbaddecaf888')
+    plaintext = bytes.fromhex(
+        'd9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72'
+        '1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b39'
+    )
+    aad = bytes.fromhex('feedfacedeadbeeffeedfacedeadbeefabaddad2')
+
+    ciphertext, tag = encrypt(key, iv, plaintext, aad)
+    print('Ciphertext:', ciphertext.hex())
+    print('Tag:', tag.hex())
+    print('Decrypted Plaintext:', decrypt(key, iv, ciphertext, tag, aad).hex())
+
+    # table multiplication against the bit by bit reference
+    h = bytearray(block_size)
+    AES(key).encrypt_into(h, h)
+    h = int.from_bytes(h, 'big')
+    g = GHASH(h)
+    x = int.from_bytes(plaintext[:16], 'big')
+    print('Table GHASH matches reference:', g.mul_h(x) == gf128_mul(x, h))
+
+    # tampering is detected
+    try:
+        decrypt(key, iv, ciphertext[:-1] + bytes([ciphertext[-1] ^ 1]), tag, aad)
+    except ValueError as e:
+        print('Tampered ciphertext:', e)
+
+
+if __name__ == '__main__':
+    main()
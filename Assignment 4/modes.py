@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# This file contains the ECB, CBC and CTR modes of operation for AES.
+# Every mode is an incremental object: data is fed in chunks of any size
+# with update() and the remaining output is flushed with finalize(), so
+# a payload never has to be held in memory as a whole.
+#
+# Blocks are read and written in the standard (FIPS-197) byte order,
+# i.e. bytes 4c..4c+3 make up column c of the state.
+
+from aes import AES, encrypt_words, decrypt_words, block_struct as block
+
+# constants
+block_size = 16
+chunk_size = 1 << 16 # default read size for streams
+
+
+def pkcs7_pad(data, size = block_size):
+    """
+    Pad data to a multiple of size (PKCS#7)
+    """
+    pad_len = size - len(data) % size
+    return bytes(data) + bytes([pad_len] * pad_len)
+
+
+def pkcs7_unpad(data, size = block_size):
+    """
+    Remove PKCS#7 padding from data
+    """
+    if len(data) == 0 or len(data) % size != 0:
+        raise ValueError("Invalid padded data length")
+    pad_len = data[-1]
+    if pad_len < 1 or pad_len > size or any(x != pad_len for x in data[-pad_len:]):
+        raise ValueError("Invalid padding")
+    return bytes(data[:-pad_len])
+
+
+def to_cipher(key):
+    """
+    Return an AES object for a key (or the object itself)
+    """
+    return key if isinstance(key, AES) else AES(key)
+
+
+class BlockMode:
+    """
+    Base class for the padded block modes (ECB, CBC)
+    Subclasses implement process(buf, n, out) for the first n bytes of buf.
+    """
+
+    padded_output = False # whether the output (rather than the input) carries the padding
+
+    def __init__(self, key):
+        self.cipher = to_cipher(key)
+        self.rk = self.cipher.rk
+        self.dk = self.cipher.dk
+        self.buf = bytearray()
+        self.finalized = False
+
+    def update(self, data):
+        """
+        Process a chunk of data, returning whatever output is ready
+        """
+        if self.finalized:
+            raise ValueError("Context already finalized")
+        buf = self.buf
+        buf += data
+        n = len(buf) - len(buf) % block_size
+        if self.padded_output and n == len(buf):
+            n -= block_size # hold back the last block (it may carry padding)
+        if n <= 0:
+            return b''
+        out = bytearray(n)
+        self.process(buf, n, out)
+        del buf[:n]
+        return bytes(out)
+
+    def finalize(self):
+        """
+        Process the remaining buffered data (adding or removing padding)
+        """
+        if self.finalized:
+            raise ValueError("Context already finalized")
+        self.finalized = True
+        if self.padded_output:
+            if len(self.buf) != block_size:
+                raise ValueError("Invalid padded data length")
+            out = bytearray(block_size)
+            self.process(self.buf, block_size, out)
+            return pkcs7_unpad(out)
+        buf = bytearray(pkcs7_pad(self.buf))
+        out = bytearray(len(buf))
+        self.process(buf, len(buf), out)
+        return bytes(out)
+
+
+class ECBEncryptor(BlockMode):
+    """
+    AES encryption in ECB mode (with PKCS#7 padding)
+    """
+
+    def process(self, buf, n, out):
+        self.cipher.encrypt_into(buf, out, 0, n // block_size)
+
+
+class ECBDecryptor(BlockMode):
+    """
+    AES decryption in ECB mode (with PKCS#7 padding)
+    """
+
+    padded_output = True
+
+    def process(self, buf, n, out):
+        self.cipher.decrypt_into(buf, out, 0, n // block_size)
+
+
+class CBCEncryptor(BlockMode):
+    """
+    AES encryption in CBC mode (with PKCS#7 padding)
+    """
+
+    def __init__(self, key, iv):
+        super().__init__(key)
+        if len(iv) != block_size:
+            raise ValueError(f"Invalid IV length: {len(iv)}")
+        self.prev = block.unpack(bytes(iv))
+
+    def process(self, buf, n, out):
+        rk = self.rk
+        c0, c1, c2, c3 = self.prev
+        for off in range(0, n, block_size):
+            p0, p1, p2, p3 = block.unpack_from(buf, off)
+            c0, c1, c2, c3 = encrypt_words(p0 ^ c0, p1 ^ c1, p2 ^ c2, p3 ^ c3, rk)
+            block.pack_into(out, off, c0, c1, c2, c3)
+        self.prev = c0, c1, c2, c3
+
+
+class CBCDecryptor(BlockMode):
+    """
+    AES decryption in CBC mode (with PKCS#7 padding)
+    """
+
+    padded_output = True
+
+    def __init__(self, key, iv):
+        super().__init__(key)
+        if len(iv) != block_size:
+            raise ValueError(f"Invalid IV length: {len(iv)}")
+        self.prev = block.unpack(bytes(iv))
+
+    def process(self, buf, n, out):
+        dk = self.dk
+        c0, c1, c2, c3 = self.prev
+        for off in range(0, n, block_size):
+            c = block.unpack_from(buf, off)
+            p0, p1, p2, p3 = decrypt_words(*c, dk)
+            block.pack_into(out, off, p0 ^ c0, p1 ^ c1, p2 ^ c2, p3 ^ c3)
+            c0, c1, c2, c3 = c
+        self.prev = c0, c1, c2, c3
+
+
+class CTRCipher:
+    """
+    AES in CTR mode (encryption and decryption are the same operation)
+    The last width bits of the initial counter block are incremented as a
+    big-endian integer (the whole 128-bit block by default).
+    """
+
+    def __init__(self, key, nonce, width = 128):
+        if len(nonce) != block_size:
+            raise ValueError(f"Invalid counter block length: {len(nonce)}")
+        if width <= 0 or width > 128:
+            raise ValueError(f"Invalid counter width: {width}")
+        self.cipher = to_cipher(key)
+        self.rk = self.cipher.rk
+        self.counter = int.from_bytes(nonce, 'big')
+        self.low = (1 << width) - 1 # bits of the counter that are incremented
+        self.high = ((1 << 128) - 1) ^ self.low
+        self.keystream = b'' # unused keystream bytes of the current block
+        self.finalized = False
+
+    def update(self, data):
+        """
+        Process a chunk of data, returning the same number of bytes
+        """
+        if self.finalized:
+            raise ValueError("Context already finalized")
+        data = memoryview(data).cast('B')
+        out = bytearray(len(data))
+
+        # use up the leftover keystream of the previous call first
+        k = min(len(self.keystream), len(data))
+        for i in range(k):
+            out[i] = data[i] ^ self.keystream[i]
+        self.keystream = self.keystream[k:]
+
+        rk = self.rk
+        ctr = self.counter
+        low, high = self.low, self.high
+        msk = (1 << 32) - 1
+        end = k + (len(data) - k) // block_size * block_size
+        for off in range(k, end, block_size):
+            s0, s1, s2, s3 = encrypt_words(ctr >> 96, (ctr >> 64) & msk, (ctr >> 32) & msk, ctr & msk, rk)
+            ctr = (ctr & high) | ((ctr + 1) & low)
+            d0, d1, d2, d3 = block.unpack_from(data, off)
+            block.pack_into(out, off, d0 ^ s0, d1 ^ s1, d2 ^ s2, d3 ^ s3)
+
+        if end < len(data):
+            # partial block, save the rest of the keystream for the next call
+            ks = block.pack(*encrypt_words(ctr >> 96, (ctr >> 64) & msk, (ctr >> 32) & msk, ctr & msk, rk))
+            ctr = (ctr & high) | ((ctr + 1) & low)
+            r = len(data) - end
+            for i in range(r):
+                out[end + i] = data[end + i] ^ ks[i]
+            self.keystream = ks[r:]
+
+        self.counter = ctr
+        return bytes(out)
+
+    def finalize(self):
+        """
+        Finish the stream (CTR mode has no buffered data)
+        """
+        if self.finalized:
+            raise ValueError("Context already finalized")
+        self.finalized = True
+        return b''
+
+
+def process_stream(ctx, fin, fout, size = chunk_size):
+    """
+    Run a mode object over a binary input stream, writing to an output stream
+    """
+    while True:
+        chunk = fin.read(size)
+        if not chunk:
+            break
+        fout.write(ctx.update(chunk))
+    fout.write(ctx.finalize())
+
+
+def main():
+    # demonstration on the book example key
+    key = bytes.fromhex('0f1571c947d9e8590cb7add6af7f6798')
+    iv = bytes.fromhex('000102030405060708090a0b0c0d0e0f')
+    msg = b'Two One Nine Two, streaming through AES in chunks of any size.'
+    print('Message:', msg.decode())
+
+    for name, enc, dec in (
+        ('ECB', ECBEncryptor(key), ECBDecryptor(key)),
+        ('CBC', CBCEncryptor(key, iv), CBCDecryptor(key, iv)),
+        ('CTR', CTRCipher(key, iv), CTRCipher(key, iv)),
+    ):
+        # feed the message in uneven chunks
+        ciphertext = b''.join(enc.update(msg[i:i + 7]) for i in range(0, len(msg), 7)) + enc.finalize()
+        plaintext = b''.join(dec.update(ciphertext[i:i + 5]) for i in range(0, len(ciphertext), 5)) + dec.finalize()
+        print(f'{name} Ciphertext:', ciphertext.hex())
+        print(f'{name} Decrypted:', plaintext.decode())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+# This file contains random-access encryption of files on top of aes.py.
+# The encrypted file is memory-mapped and only the blocks covering a requested
+# byte range are decrypted (or re-encrypted on a write), so reading a few KB from
+# the middle of a large file costs a few blocks of AES instead of a full pass.
+#
+# Two layouts are supported:
+#   - CTR: the keystream block for byte offset o is E(nonce + o // 16)
+#   - XTS (IEEE 1619): the file is split into sectors, every block is encrypted
+#     with a tweak derived from its sector number and its position in the sector
+#     (the file length must be a multiple of 16, ciphertext stealing is not supported)
+
+import os
+import mmap
+import time
+import tempfile
+from aes import AES
+from modes import CTRCipher, process_stream, block_size
+
+# constants
+sector_size = 4096
+
+
+class EncryptedFile:
+    """
+    Base class for a memory-mapped encrypted file opened for reading and writing
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.size = len(self.map)
+
+    def check_range(self, offset, length):
+        """
+        Make sure [offset, offset + length) lies within the file
+        """
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise ValueError(f"Range [{offset}, {offset + length}) is outside the file")
+
+    def close(self):
+        """
+        Flush and unmap the file
+        """
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CTRFile(EncryptedFile):
+    """
+    File encrypted in CTR mode with random-access reads and writes
+    (rewriting a region reuses its keystream, so an old copy of the file
+    and a new one reveal the XOR of the old and new plaintext)
+    """
+
+    def __init__(self, path, key, nonce):
+        super().__init__(path)
+        if len(nonce) != block_size:
+            raise ValueError(f"Invalid counter block length: {len(nonce)}")
+        self.cipher = AES(key)
+        self.counter = int.from_bytes(nonce, 'big')
+
+    def keystream(self, offset):
+        """
+        CTR context positioned at a byte offset of the file
+        """
+        ctr = (self.counter + offset // block_size) % (1 << 128)
+        ctx = CTRCipher(self.cipher, ctr.to_bytes(block_size, 'big'))
+        ctx.update(bytes(offset % block_size)) # skip to the offset within the block
+        return ctx
+
+    def read(self, offset, length):
+        """
+        Decrypt length bytes starting at offset
+        """
+        self.check_range(offset, length)
+        return self.keystream(offset).update(self.map[offset:offset + length])
+
+    def write(self, offset, data):
+        """
+        Encrypt data in place starting at offset
+        """
+        self.check_range(offset, len(data))
+        self.map[offset:offset + len(data)] = self.keystream(offset).update(data)
+
+
+def gf128_mul_alpha(t):
+    """
+    Multiply a tweak (as a little-endian int) by the primitive element of GF(2^128)
+    """
+    t <<= 1
+    if t >> 128:
+        t ^= (1 << 128) | 0x87 # x^128 = x^7 + x^2 + x + 1
+    return t
+
+
+class XTSFile(EncryptedFile):
+    """
+    File encrypted in XTS mode with random-access reads and writes
+    """
+
+    def __init__(self, path, key1, key2, size = sector_size):
+        super().__init__(path)
+        if size <= 0 or size % block_size != 0:
+            raise ValueError(f"Sector size must be a positive multiple of {block_size}")
+        if self.size % block_size != 0:
+            raise ValueError(f"File length must be a multiple of {block_size}")
+        self.cipher = AES(key1)
+        self.tweak_cipher = AES(key2)
+        self.sector_size = size
+
+    def tweak(self, sector, block):
+        """
+        Tweak of a block within a sector (as a little-endian int)
+        """
+        t = bytearray(sector.to_bytes(block_size, 'little'))
+        self.tweak_cipher.encrypt_into(t, t)
+        t = int.from_bytes(t, 'little')
+        for _ in range(block):
+            t = gf128_mul_alpha(t)
+        return t
+
+    def crypt(self, data, start, decrypt):
+        """
+        Encrypt or decrypt data that sits at offset start of the file
+        (start and the length of data are multiples of the block size)
+        """
+        out = bytearray(data)
+        func = self.cipher.decrypt_into if decrypt else self.cipher.encrypt_into
+        pos = 0
+        while pos < len(out):
+            sector, rem = divmod(start + pos, self.sector_size)
+            stop = min(len(out), pos + self.sector_size - rem)
+            t = self.tweak(sector, rem // block_size)
+            for off in range(pos, stop, block_size):
+                x = int.from_bytes(out[off:off + block_size], 'little') ^ t
+                out[off:off + block_size] = x.to_bytes(block_size, 'little')
+                func(out, out, off)
+                x = int.from_bytes(out[off:off + block_size], 'little') ^ t
+                out[off:off + block_size] = x.to_bytes(block_size, 'little')
+                t = gf128_mul_alpha(t)
+            pos = stop
+        return out
+
+    def block_range(self, offset, length):
+        """
+        Smallest range of whole blocks covering [offset, offset + length)
+        """
+        self.check_range(offset, length)
+        start = offset - offset % block_size
+        end = -(-(offset + length) // block_size) * block_size
+        return start, end
+
+    def read(self, offset, length):
+        """
+        Decrypt length bytes starting at offset
+        """
+        start, end = self.block_range(offset, length)
+        buf = self.crypt(self.map[start:end], start, decrypt=True)
+        return bytes(buf[offset - start:offset - start + length])
+
+    def write(self, offset, data):
+        """
+        Encrypt data in place starting at offset
+        (partially covered blocks are decrypted, patched and encrypted again)
+        """
+        start, end = self.block_range(offset, len(data))
+        buf = self.crypt(self.map[start:end], start, decrypt=True)
+        buf[offset - start:offset - start + len(data)] = data
+        self.map[start:end] = self.crypt(buf, start, decrypt=False)
+
+    def encrypt_all(self):
+        """
+        Encrypt the whole (plaintext) file in place, one sector at a time
+        """
+        for start in range(0, self.size, self.sector_size):
+            end = min(self.size, start + self.sector_size)
+            self.map[start:end] = self.crypt(self.map[start:end], start, decrypt=False)
+
+
+def ctr_encrypt_file(src, dst, key, nonce):
+    """
+    Encrypt a whole file in CTR mode (to be opened later with CTRFile)
+    """
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        process_stream(CTRCipher(key, nonce), fin, fout)
+
+
+def main():
+    key = bytes.fromhex('0f1571c947d9e8590cb7add6af7f6798')
+    key2 = bytes.fromhex('000102030405060708090a0b0c0d0e0f')
+    nonce = bytes(block_size)
+    data = os.urandom(1 << 20)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'plain.bin')
+        with open(src, 'wb') as f:
+            f.write(data)
+
+        # CTR
+        dst = os.path.join(tmp, 'ctr.bin')
+        ctr_encrypt_file(src, dst, key, nonce)
+        with CTRFile(dst, key, nonce) as f:
+            start = time.perf_counter()
+            res = f.read(500001, 4096)
+            print('CTR read 4 KB: %.2f ms, correct: %s' % ((time.perf_counter() - start) * 1e3, res == data[500001:504097]))
+            f.write(123457, b'patched region')
+            print('CTR patch read back:', f.read(123450, 22))
+
+        # XTS
+        dst = os.path.join(tmp, 'xts.bin')
+        with open(dst, 'wb') as f:
+            f.write(data)
+        with XTSFile(dst, key, key2) as f:
+            f.encrypt_all()
+            start = time.perf_counter()
+            res = f.read(500001, 4096)
+            print('XTS read 4 KB: %.2f ms, correct: %s' % ((time.perf_counter() - start) * 1e3, res == data[500001:504097]))
+            f.write(123457, b'patched region')
+            print('XTS patch read back:', f.read(123450, 22))
+
+
+if __name__ == '__main__':
+    main()
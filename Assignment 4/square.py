@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+# This file contains the integral (Square) attack on AES reduced to 4 rounds.
+#
+# A Λ-set is 256 plaintexts that take every value in one byte (active) and agree
+# on all the others. After 3 rounds every byte of the state is balanced (XORs to 0
+# over the set). Round 4 has no MixColumns, so every byte of its round key can be
+# guessed on its own: partially decrypt the corresponding ciphertext byte through
+# the inverse S-box for all 256 guesses and keep the guesses that give a zero sum.
+# Wrong guesses survive a Λ-set with probability 1/256, so a couple of sets leave
+# only the right round key, from which the key schedule is run backwards.
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from aes import (
+    s_box, inv_s_box, r_con, circ_shift, transpose, key_expansion,
+    sub_bytes, shift_rows, mix_columns, add_round_key,
+)
+
+# constants
+np_inv_s_box = np.array(inv_s_box, dtype=np.uint8)
+guesses = np.arange(256, dtype=np.uint8)
+
+
+def round_keys(key):
+    """
+    Expand a key into 11 round key matrices (as used by the round functions)
+    """
+    return [transpose(x) for x in key_expansion([key[i:i + 4] for i in range(0, 16, 4)])]
+
+
+def encrypt_reduced(plaintext, k, rounds = 4):
+    """
+    AES encrypt 16-byte block with a reduced no. of rounds
+    (the last round has no MixColumns, bytes are in the standard order)
+    """
+    s = transpose([plaintext[i:i + 4] for i in range(0, 16, 4)])
+    add_round_key(s, k[0])
+    for i in range(1, rounds):
+        sub_bytes(s)
+        shift_rows(s)
+        mix_columns(s)
+        add_round_key(s, k[i])
+    sub_bytes(s)
+    shift_rows(s)
+    add_round_key(s, k[rounds])
+    return [s[r][c] for c in range(4) for r in range(4)]
+
+
+def lambda_set(active, const):
+    """
+    256 plaintexts where byte active takes every value and the rest equal const
+    """
+    res = []
+    for x in range(256):
+        p = list(const)
+        p[active] = x
+        res.append(p)
+    return res
+
+
+def balanced_guesses(ciphertexts):
+    """
+    Boolean (16, 256) array of the last round key byte guesses that leave
+    the state before the last round balanced for a Λ-set of ciphertexts
+    """
+    c = np.array(ciphertexts, dtype=np.uint8).T # (16 bytes, 256 texts)
+    # partial decryption of every byte under every guess: (16, 256 guesses, 256 texts)
+    s = np_inv_s_box[c[:, None, :] ^ guesses[None, :, None]]
+    return np.bitwise_xor.reduce(s, axis=2) == 0
+
+
+def attack_set(key, active, const):
+    """
+    Encrypt one Λ-set with the oracle (the key is only used here) and filter the guesses
+    (runs in a worker process)
+    """
+    k = round_keys(key)
+    ciphertexts = [encrypt_reduced(p, k) for p in lambda_set(active, const)]
+    return balanced_guesses(ciphertexts)
+
+
+def invert_key_schedule(round_key, r):
+    """
+    Recover the key from round key r (16 bytes in the standard order)
+    """
+    w = [None] * (4 * r) + [list(round_key[i:i + 4]) for i in range(0, 16, 4)]
+    for i in range(4 * r + 3, 3, -1):
+        tmp = list(w[i - 1])
+        if i % 4 == 0:
+            circ_shift(tmp, 1)
+            for j in range(4): tmp[j] = s_box[tmp[j]]
+            tmp[0] ^= r_con[i // 4]
+        w[i - 4] = [w[i][j] ^ tmp[j] for j in range(4)]
+    return [x for word in w[:4] for x in word]
+
+
+def square_attack(key, workers = None, max_sets = 8, seed = None):
+    """
+    Recover the key of 4-round AES with the Square attack
+    (key stands for the encryption oracle, Λ-sets are attacked in parallel)
+    Returns the recovered key and the no. of Λ-sets used.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = np.ones((16, 256), dtype=bool)
+    used = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while used < max_sets and (candidates.sum(axis=1) > 1).any():
+            # 2 sets usually leave one candidate per byte, attack one set per worker at once
+            n = min(max(2, workers), max_sets - used)
+            futures = [
+                executor.submit(attack_set, key, int(rng.integers(16)), rng.integers(0, 256, 16).tolist())
+                for _ in range(n)
+            ]
+            for future in futures:
+                candidates &= future.result()
+            used += n
+
+    if (candidates.sum(axis=1) != 1).any():
+        raise ValueError("Could not narrow down the last round key")
+    k4 = candidates.argmax(axis=1).tolist()
+    return invert_key_schedule(k4, 4), used
+
+
+def main():
+    key = list(os.urandom(16))
+    print('Key:', bytes(key).hex())
+
+    start = time.perf_counter()
+    recovered, used = square_attack(key)
+    elapsed = time.perf_counter() - start
+
+    print('Recovered key:', bytes(recovered).hex())
+    print(f'Λ-sets used: {used}, time: {elapsed:.2f}s')
+    print('Correct:', recovered == key)
+
+
+if __name__ == '__main__':
+    main()
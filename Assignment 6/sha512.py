@@ -1,4 +1,6 @@
+import hashlib
 from functools import reduce
+from struct import Struct
 import BitVector.BitVector as BitVector
 
 
@@ -45,6 +47,12 @@ _round_const = (
 )
 round_const = [BitVector(hexstring=s) for s in _round_const]
 
+# the same constants as native ints (for the int engine)
+init_hash_int = tuple(int(s, 16) for s in _init_hash)
+round_const_int = tuple(int(s, 16) for s in _round_const)
+mask64 = (1 << 64) - 1
+block_struct = Struct('>16Q')
+
 # (msg_len + 1 + zeros + 128) % 1024 = 0
 
 def pad(bv):
@@ -115,7 +123,7 @@ def round(a, b, c, d, e, f, g, h, w, k):
     return a, b, c, d, e, f, g, h
 
 
-def sha512(bv):
+def sha512_bitvector(bv):
     # STEP 1:
     # Pad the input message so that its length is an integer multiple
     # of the block size which is 1024 bits. This padding must account
@@ -166,11 +174,146 @@ def sha512(bv):
     return msg_hash
 
 
+def compress(state, block):
+    """
+    SHA-512 compression function on native ints.
+    Process one 128-byte block and return the new state (8 words of 64 bits).
+    Rotations are written as (x >> n) | (x << (64 - n)): the bits above 64 they leave
+    behind do not affect the low 64 bits of XORs and sums, so a mask is only applied
+    where a word is stored.
+    """
+    w = list(block_struct.unpack(block))
+    for i in range(16, 80):
+        x = w[i-15]
+        y = w[i-2]
+        w.append((
+            w[i-16] + w[i-7] +
+            (((x >> 1) | (x << 63)) ^ ((x >> 8) | (x << 56)) ^ (x >> 7)) +
+            (((y >> 19) | (y << 45)) ^ ((y >> 61) | (y << 3)) ^ (y >> 6))
+        ) & mask64)
+
+    a, b, c, d, e, f, g, h = state
+    for k, x in zip(round_const_int, w):
+        t1 = (
+            h + k + x +
+            (((e >> 14) | (e << 50)) ^ ((e >> 18) | (e << 46)) ^ ((e >> 41) | (e << 23))) +
+            ((e & f) ^ (~e & g))
+        )
+        t2 = (
+            (((a >> 28) | (a << 36)) ^ ((a >> 34) | (a << 30)) ^ ((a >> 39) | (a << 25))) +
+            ((a & b) ^ (a & c) ^ (b & c))
+        )
+        h = g
+        g = f
+        f = e
+        e = (d + t1) & mask64
+        d = c
+        c = b
+        b = a
+        a = (t1 + t2) & mask64
+
+    return tuple((x + y) & mask64 for x, y in zip(state, (a, b, c, d, e, f, g, h)))
+
+
+def sha512_int(msg, msg_len = None):
+    """
+    SHA-512 of a message given as an int of msg_len bits (or as bytes), on native ints.
+    Returns the 64-byte digest.
+    """
+    if isinstance(msg, (bytes, bytearray)):
+        msg, msg_len = int.from_bytes(msg, 'big'), len(msg) * 8
+    pad_len = (1024 - (msg_len + 1 + 128)) % 1024  # no. of zeros to pad
+    total = msg_len + 1 + pad_len + 128
+    data = ((((msg << 1) | 1) << (pad_len + 128)) | msg_len).to_bytes(total // 8, 'big')
+
+    state = init_hash_int
+    for n in range(0, len(data), 128):
+        state = compress(state, data[n: n+128])
+    return b''.join(x.to_bytes(8, 'big') for x in state)
+
+
+class SHA512:
+    """
+    Incremental SHA-512 with the same interface as hashlib objects
+    (update, digest, hexdigest, copy). Only one partial 128-byte block is buffered,
+    so streams of any length are hashed in constant memory.
+    """
+
+    name = 'sha512'
+    digest_size = 64
+    block_size = 128
+
+    def __init__(self, data = b''):
+        self.state = init_hash_int
+        self.buf = b''  # partial block
+        self.msg_len = 0  # no. of bits hashed so far
+        self.update(data)
+
+    def update(self, data):
+        """
+        Hash more bytes of the message.
+        """
+        data = memoryview(data).cast('B')
+        self.msg_len += len(data) * 8
+        state = self.state
+        pos = 0
+        if self.buf:
+            pos = min(len(data), 128 - len(self.buf))
+            self.buf += bytes(data[:pos])
+            if len(self.buf) < 128:
+                return
+            state = compress(state, self.buf)
+            self.buf = b''
+        end = pos + (len(data) - pos) // 128 * 128
+        for n in range(pos, end, 128):
+            state = compress(state, data[n: n+128])
+        self.state = state
+        self.buf = bytes(data[end:])
+
+    def digest(self):
+        """
+        Hash of the message so far (more data can still be added).
+        """
+        pad_len = (1024 - (self.msg_len + 1 + 128)) % 1024  # no. of zeros to pad
+        tail = self.buf + b'\x80' + bytes(pad_len // 8) + self.msg_len.to_bytes(16, 'big')
+        state = self.state
+        for n in range(0, len(tail), 128):
+            state = compress(state, tail[n: n+128])
+        return b''.join(x.to_bytes(8, 'big') for x in state)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+    def copy(self):
+        """
+        Independent copy of the hash object (to hash messages with a common prefix).
+        """
+        res = SHA512.__new__(SHA512)
+        res.state = self.state
+        res.buf = self.buf
+        res.msg_len = self.msg_len
+        return res
+
+
+def sha512(bv, engine = 'bitvector'):
+    """
+    SHA-512 of a BitVector message, returning the 512-bit hash as a BitVector.
+    The engine is either 'bitvector' (the operations on BitVectors below) or 'int'
+    (compress on native ints, much faster). Both give the same hash.
+    """
+    if engine == 'int':
+        msg = int(str(bv), 2) if bv.length() > 0 else 0  # much faster than int(bv)
+        return BitVector(rawbytes=sha512_int(msg, bv.length()))
+    elif engine != 'bitvector':
+        raise ValueError(f"Unknown engine: {engine}")
+    return sha512_bitvector(bv)
+
+
 def main():
     msg = input('Enter message to hash: ')
-    msg = BitVector(textstring=msg)
-    msg_hash = sha512(msg)
+    msg_hash = sha512(BitVector(textstring=msg), engine='int')
     print(*[msg_hash.get_bitvector_in_hex()[i:i+16] for i in range(0, 128, 16)])
+    print('Matches hashlib:', msg_hash.get_bitvector_in_hex() == hashlib.sha512(msg.encode('latin-1')).hexdigest())
 
 
 if __name__ == '__main__':